@@ -19,6 +19,12 @@ class TestParseVersion:
     def test_garbage(self):
         assert app_update.parse_version('not-a-version') == (0, 0, 0)
 
+    def test_suffix_ignored(self):
+        assert app_update.parse_version('v2.0.4-rc1') == (2, 0, 4)
+
+    def test_short_version_padded(self):
+        assert app_update.parse_version('2.3') == (2, 3, 0)
+
     def test_ordering(self):
         assert app_update.parse_version('v2.10.0') > app_update.parse_version('2.9.9')
 
@@ -113,6 +119,69 @@ class TestChecksums:
         assert app_update.verify_download(str(f), 'x.exe', 'https://x/sums', 'UA') is False
 
 
+class TestDownload:
+    def _fake_response(self, payload, content_length=None):
+        import io
+
+        class FakeResponse(io.BytesIO):
+            headers = {'content-length': str(len(payload) if content_length is None
+                                             else content_length)}
+
+        return FakeResponse(payload)
+
+    def test_download_writes_file(self, tmp_path, monkeypatch):
+        payload = os.urandom(app_update.CHUNK_SIZE * 2 + 123)
+        monkeypatch.setattr(app_update, '_update_dir', lambda: str(tmp_path))
+        monkeypatch.setattr(app_update, '_http_get',
+                            lambda *a, **k: self._fake_response(payload))
+        path = app_update.download_update('https://x/app.exe', 'app.exe', 'UA')
+        assert path == str(tmp_path / 'app.exe')
+        with open(path, 'rb') as f:
+            assert f.read() == payload
+
+    def test_short_read_rejected(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(app_update, '_update_dir', lambda: str(tmp_path))
+        monkeypatch.setattr(app_update, '_http_get',
+                            lambda *a, **k: self._fake_response(b'x' * 10, content_length=100))
+        assert app_update.download_update('https://x/app.exe', 'app.exe', 'UA') is None
+
+
+class TestReleaseCache:
+    RELEASE = {'tag_name': 'v9.9.9', 'body': 'notes', 'html_url': 'https://x/rel',
+               'assets': [{'name': 'SHA256SUMS.txt', 'browser_download_url': 'https://x/sums',
+                           'size': 1}]}
+
+    def test_etag_stored_then_304_reuses_release(self, monkeypatch):
+        import io
+        import json
+        import urllib.error
+
+        sent_headers = []
+
+        class FakeResponse(io.BytesIO):
+            headers = {'ETag': '"abc"'}
+
+        def first_get(url, ua, timeout=10, headers=None):
+            sent_headers.append(headers)
+            return FakeResponse(json.dumps(self.RELEASE).encode())
+
+        cache = {}
+        monkeypatch.setattr(app_update, '_http_get', first_get)
+        info = app_update.check_for_updates('1.0.0', 'UA', cache=cache)
+        assert info['available'] is True
+        assert cache['etag'] == '"abc"'
+        assert sent_headers == [{}]
+
+        def second_get(url, ua, timeout=10, headers=None):
+            sent_headers.append(headers)
+            raise urllib.error.HTTPError(url, 304, 'Not Modified', {}, None)
+
+        monkeypatch.setattr(app_update, '_http_get', second_get)
+        again = app_update.check_for_updates('1.0.0', 'UA', cache=cache)
+        assert sent_headers[-1] == {'If-None-Match': '"abc"'}
+        assert again == info
+
+
 class TestUpdateScript:
     def test_script_contents(self):
         script = app_update.build_update_script(
@@ -1,3 +1,4 @@
+import json
 import os
 import sys
 
@@ -41,6 +42,27 @@ class TestSettings:
         db = make_db(tmp_path)
         assert db.get_watchlist() == ['AAPL', 'NVDA']
 
+    def test_watchlist_roundtrip_and_mirror(self, tmp_path):
+        db = make_db(tmp_path)
+        db.set_watchlist(['NVDA', 'TSLA', 'AAPL', 'TSLA'])
+        assert db.get_watchlist() == ['AAPL', 'NVDA', 'TSLA']
+        assert make_db(tmp_path).get_watchlist() == ['AAPL', 'NVDA', 'TSLA']
+        with open(config.LEGACY_WATCHLIST_FILE) as f:
+            assert json.load(f) == {'WATCHLIST': ['AAPL', 'NVDA', 'TSLA']}
+        assert not os.path.exists(config.LEGACY_WATCHLIST_FILE + '.tmp')
+
+    def test_watchlist_unchanged_skips_write(self, tmp_path):
+        db = make_db(tmp_path)
+        db.set_watchlist(['AAPL', 'TSLA'])
+        os.remove(config.LEGACY_WATCHLIST_FILE)
+        db.set_watchlist(['TSLA', 'AAPL'])
+        assert not os.path.exists(config.LEGACY_WATCHLIST_FILE)
+
+    def test_watchlist_copy_is_not_shared(self, tmp_path):
+        db = make_db(tmp_path)
+        db.get_watchlist().append('ZZZ')
+        assert 'ZZZ' not in db.get_watchlist()
+
 
 class TestPriceHistory:
     def test_record_and_latest(self, tmp_path):
@@ -61,6 +61,21 @@ class TestProbe:
         assert results[0]['reachable'] is False
         assert results[0]['error']
 
+    def test_probe_many_endpoints_keeps_order(self):
+        import socket
+        listener = socket.socket()
+        listener.bind(('127.0.0.1', 0))
+        listener.listen(1)
+        open_port = listener.getsockname()[1]
+        try:
+            results = probe_ib_ports([('127.0.0.1', 1, 'Closed'),
+                                      ('127.0.0.1', open_port, 'Open')], timeout=0.5)
+        finally:
+            listener.close()
+        assert [r['label'] for r in results] == ['Closed', 'Open']
+        assert results[0]['reachable'] is False
+        assert results[1]['reachable'] is True
+
     def test_probe_resolves_pending_connect_via_select(self):
         # connect_ex() on a non-blocking socket returns EINPROGRESS/
         # WSAEWOULDBLOCK immediately for a handshake still in flight -- on
@@ -96,6 +111,15 @@ class TestProbe:
         assert results[0]['reachable'] is False
         assert results[0]['error'] == 'timeout'
 
+    def test_probe_select_failure_marks_pending_endpoints(self):
+        mock_sock = MagicMock()
+        mock_sock.connect_ex.return_value = 36  # EINPROGRESS
+        with patch('socket.socket', return_value=mock_sock), \
+             patch('select.select', side_effect=OSError('select failed')):
+            results = probe_ib_ports([('127.0.0.1', 7496, 'TWS Live')], timeout=0.1)
+        assert results[0]['reachable'] is False
+        assert results[0]['error'] == 'select failed'
+
 
 class TestManagerStatus:
     def test_initial_status_shape(self):
@@ -112,3 +136,86 @@ class TestManagerStatus:
 
     def test_retry_in_seconds_without_schedule(self):
         assert IBKRManager().retry_in_seconds() == 0
+
+
+class TestDisconnectWakesLoop:
+    def test_disconnect_cuts_heartbeat_sleep_short(self):
+        from ttc_app.ibkr_manager import HEARTBEAT_INTERVAL
+        manager = IBKRManager(client_id=555)
+        manager.state = 'connected'
+
+        async def run():
+            loop = asyncio.get_running_loop()
+            manager._stop_event = asyncio.Event()
+            manager._retry_now_event = asyncio.Event()
+            loop.call_later(0.05, manager._on_disconnected)
+            start = loop.time()
+            await asyncio.wait_for(manager._interruptible_sleep(HEARTBEAT_INTERVAL), timeout=1)
+            return loop.time() - start
+
+        assert asyncio.run(run()) < 1
+        assert manager.state == 'reconnecting'
+
+    def test_disconnect_during_heartbeat_is_not_missed(self):
+        manager = IBKRManager(client_id=555)
+        manager.state = 'connected'
+        connected = [True]
+        reconnects = []
+
+        async def heartbeat():
+            if connected[0] and not reconnects:
+                # Callback fires before the loop resumes after the heartbeat
+                connected[0] = False
+                manager._on_disconnected()
+
+        async def reconnect():
+            reconnects.append(1)
+            connected[0] = True
+            manager._stop_event.set()
+            return True
+
+        manager._ib = MagicMock()
+        manager._ib.isConnected.side_effect = lambda: connected[0]
+        manager._ib.reqCurrentTimeAsync.side_effect = heartbeat
+        manager._try_connect_all = reconnect
+
+        async def run():
+            manager._stop_event = asyncio.Event()
+            manager._retry_now_event = asyncio.Event()
+            await asyncio.wait_for(manager._connection_loop(), timeout=1)
+
+        asyncio.run(run())
+        assert reconnects == [1]
+
+
+class TestWaitForFirstData:
+    def _manager_with_ib(self):
+        from ib_async import IB
+        manager = IBKRManager(client_id=555)
+        manager._ib = IB()
+        return manager
+
+    def test_returns_on_tick_without_waiting_out_deadline(self):
+        manager = self._manager_with_ib()
+        ticker = MagicMock(price=0)
+
+        async def run():
+            async def tick():
+                await asyncio.sleep(0.05)
+                ticker.price = 10
+                manager._ib.pendingTickersEvent.emit({ticker})
+            asyncio.get_running_loop().create_task(tick())
+            start = asyncio.get_running_loop().time()
+            await manager._wait_for_first_data([ticker], lambda t: t.price > 0)
+            return asyncio.get_running_loop().time() - start
+
+        assert asyncio.run(run()) < 1
+        assert len(manager._ib.pendingTickersEvent) == 0
+
+    def test_deadline_bounds_wait(self, monkeypatch):
+        from ttc_app import ibkr_manager
+        monkeypatch.setattr(ibkr_manager, 'FIRST_PRICE_DEADLINE', 0.1)
+        manager = self._manager_with_ib()
+        ticker = MagicMock(price=0)
+        asyncio.run(manager._wait_for_first_data([ticker], lambda t: t.price > 0))
+        assert len(manager._ib.pendingTickersEvent) == 0
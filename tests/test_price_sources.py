@@ -1,5 +1,10 @@
+import http.client
 import os
 import sys
+import threading
+import urllib.error
+
+import pytest
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -7,6 +12,12 @@ from ttc_app import price_sources
 from ttc_app.price_sources import is_cusip, parse_cboe_quote
 
 
+@pytest.fixture(autouse=True)
+def fresh_quote_cache(monkeypatch):
+    monkeypatch.setattr(price_sources, '_quote_cache', {})
+    monkeypatch.setattr(price_sources, '_yahoo_backoff_until', 0.0)
+
+
 class TestIsCusip:
     def test_ticker(self):
         assert is_cusip('AAPL') is False
@@ -18,6 +29,11 @@ class TestIsCusip:
     def test_exchange_suffix_ticker(self):
         assert is_cusip('WBD.TEN') is False
 
+    def test_needs_length_and_three_digits(self):
+        assert is_cusip('AB12CDEF') is False   # long, only two digits
+        assert is_cusip('A1B2C3') is False     # three digits, too short
+        assert is_cusip('ABCDE123') is True
+
 
 class TestCboeParsing:
     def test_valid_quote(self):
@@ -47,7 +63,134 @@ class TestCboeParsing:
 
     def test_fetch_skips_cusips(self, monkeypatch):
         calls = []
-        monkeypatch.setattr(price_sources, '_urlopen',
+        monkeypatch.setattr(price_sources, '_get_json',
                             lambda *a, **k: calls.append(a) or (_ for _ in ()).throw(RuntimeError))
         assert price_sources.fetch_cboe_prices(['912828YK0']) == {}
         assert calls == []
+
+
+class TestYahooFetch:
+    def _chart(self, price, prev_close):
+        return {'chart': {'result': [{
+            'meta': {'regularMarketPrice': price, 'chartPreviousClose': prev_close},
+            'indicators': {'quote': [{'open': [prev_close], 'high': [price], 'low': [prev_close]}]},
+        }]}}
+
+    def test_fetches_every_symbol(self, monkeypatch):
+        prices = {'AAPL': 110.0, 'MSFT': 300.0, 'NVDA': 0}
+
+        def fake_get_json(url, headers, timeout=5):
+            symbol = url.split('/chart/')[1].split('?')[0]
+            return self._chart(prices[symbol], 100.0)
+
+        monkeypatch.setattr(price_sources, '_get_json', fake_get_json)
+        result = price_sources.fetch_yahoo_prices(['AAPL', 'MSFT', 'NVDA', '912828YK0'])
+        assert set(result) == {'AAPL', 'MSFT'}  # zero price and CUSIP dropped
+        assert result['AAPL']['change'] == 10.0
+        assert result['MSFT']['source'] == 'yahoo'
+
+    def test_recent_quotes_served_from_cache(self, monkeypatch):
+        calls = []
+
+        def fake_get_json(url, headers, timeout=5):
+            calls.append(url)
+            return self._chart(110.0, 100.0)
+
+        monkeypatch.setattr(price_sources, '_get_json', fake_get_json)
+        first = price_sources.fetch_yahoo_prices(['AAPL'])
+        first['AAPL']['last'] = 1.0
+        first['AAPL']['timestamp'] = '2024-03-12 10:00:00'
+        second = price_sources.fetch_yahoo_prices(['AAPL'])
+        assert len(calls) == 1
+        assert second['AAPL']['last'] == 110.0
+        assert 'timestamp' not in second['AAPL']
+        price_sources.fetch_yahoo_prices(['AAPL'], max_age=0)
+        assert len(calls) == 2
+
+    def test_rate_limit_backs_off(self, monkeypatch):
+        calls = []
+
+        def fake_get_json(url, headers, timeout=5):
+            calls.append(url)
+            raise urllib.error.HTTPError(url, 429, 'Too Many Requests', {}, None)
+
+        monkeypatch.setattr(price_sources, '_get_json', fake_get_json)
+        assert price_sources.fetch_yahoo_prices(['AAPL']) == {}
+        assert price_sources.fetch_yahoo_prices(['MSFT']) == {}
+        assert len(calls) == 1
+
+
+class TestCboeFetch:
+    def test_fetches_every_symbol_as_is(self, monkeypatch):
+        requested = []
+
+        def fake_get_json(url, headers, timeout=5):
+            requested.append(url.rsplit('/', 1)[1][:-len('.json')])
+            return {'data': {'current_price': 50.0, 'prev_day_close': 49.0}}
+
+        monkeypatch.setattr(price_sources, '_get_json', fake_get_json)
+        result = price_sources.fetch_cboe_prices(['WBD.TEN', 'aapl'])
+        assert set(result) == {'WBD.TEN', 'aapl'}
+        assert sorted(requested) == ['AAPL', 'WBD.TEN']
+
+
+class TestKeepAliveGet:
+    class FakeConnection:
+        def __init__(self, outcomes):
+            self.outcomes = outcomes
+            self.closed = False
+
+        def request(self, method, path, headers):
+            self.path = path
+
+        def getresponse(self):
+            outcome = self.outcomes.pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        def close(self):
+            self.closed = True
+
+    class FakeResponse:
+        def __init__(self, status, body):
+            self.status, self.reason, self.headers = status, 'x', {}
+            self._body = body
+
+        def read(self):
+            return self._body
+
+    def _install(self, monkeypatch, *connections):
+        made = list(connections)
+        monkeypatch.setattr(price_sources, '_connections', threading.local())
+        monkeypatch.setattr(price_sources.http.client, 'HTTPSConnection',
+                            lambda *a, **k: made.pop(0))
+
+    def test_connection_reused(self, monkeypatch):
+        conn = self.FakeConnection([self.FakeResponse(200, b'{"a": 1}'),
+                                    self.FakeResponse(200, b'{"a": 2}')])
+        self._install(monkeypatch, conn)
+        assert price_sources._get_json('https://h/x?y=1', {}) == {'a': 1}
+        assert conn.path == '/x?y=1'
+        assert price_sources._get_json('https://h/z', {}) == {'a': 2}
+
+    def test_reconnects_after_server_close(self, monkeypatch):
+        stale = self.FakeConnection([http.client.RemoteDisconnected('gone')])
+        fresh = self.FakeConnection([self.FakeResponse(200, b'[]')])
+        self._install(monkeypatch, stale, fresh)
+        assert price_sources._get_json('https://h/x', {}) == []
+        assert stale.closed
+
+    def test_bad_request_not_retried(self, monkeypatch):
+        conn = self.FakeConnection([http.client.InvalidURL('bad path')])
+        self._install(monkeypatch, conn)
+        with pytest.raises(http.client.InvalidURL):
+            price_sources._get_json('https://h/x', {})
+        assert not conn.closed
+        assert price_sources._connections.by_host['h'] is conn
+
+    def test_http_error_status(self, monkeypatch):
+        self._install(monkeypatch, self.FakeConnection([self.FakeResponse(429, b'')]))
+        with pytest.raises(urllib.error.HTTPError) as exc:
+            price_sources._get_json('https://h/x', {})
+        assert exc.value.code == 429
@@ -0,0 +1,196 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ttc_app import web
+from ttc_app.web import enhance_with_market_data, get_friendly_error, market_fields
+
+
+class FakeDB:
+    def __init__(self, settings=None, watchlist=None):
+        self.settings = settings or {}
+        self.watchlist = list(watchlist or [])
+
+    def get_setting(self, key, default=None):
+        return self.settings.get(key, default)
+
+    def get_watchlist(self):
+        return list(self.watchlist)
+
+    def set_watchlist(self, symbols):
+        self.watchlist = sorted(set(symbols))
+
+    def record_prices(self, market_data):
+        pass
+
+    def record_option_snapshots(self, options):
+        pass
+
+
+class FakeIBKR:
+    def __init__(self, positions, prices):
+        self.positions = positions
+        self.prices = prices
+
+    def get_snapshot(self, watchlist_symbols):
+        return {
+            'positions_raw': self.positions,
+            'market_data': {s: {'last': p} for s, p in self.prices.items()},
+            'failed_symbols': [],
+            'options': [],
+        }
+
+
+def position(symbol, qty, sec_type='STK', right='', avg_cost=10.0):
+    return {'symbol': symbol, 'secType': sec_type, 'right': right,
+            'position': qty, 'avgCost': avg_cost, 'conId': 0}
+
+
+@pytest.fixture(autouse=True)
+def fake_state(monkeypatch):
+    monkeypatch.setattr(web.state, 'db', FakeDB())
+
+
+class TestGetIbkrData:
+    def test_aggregates_stock_and_options(self, monkeypatch):
+        monkeypatch.setattr(web.state, 'db', FakeDB(watchlist=['MSFT']))
+        monkeypatch.setattr(web.state, 'ibkr', FakeIBKR(
+            [position('AAPL', 250), position('AAPL', -3, 'OPT', 'C'),
+             position('AAPL', -1, 'OPT', 'P'), position('TSLA', -2, 'OPT', 'P')],
+            {'AAPL': 100.0, 'TSLA': 200.0, 'MSFT': 300.0}))
+        data = web.get_ibkr_data()
+
+        (aapl,) = data['positions']
+        assert aapl['covered_calls'] == 2
+        assert aapl['uncovered_calls'] == 1
+        assert aapl['naked_puts'] == 1
+        assert data['incomplete_lots'] == [{'symbol': 'AAPL', 'shares': 50, 'avgCost': 10.0,
+                                            'marketPrice': 100.0}]
+        assert data['watchlist'] == ['MSFT', 'TSLA']
+        assert web.state.db.watchlist == ['AAPL', 'MSFT', 'TSLA']
+
+
+class TestFriendlyErrors:
+    def test_known_error_case_insensitive(self):
+        assert get_friendly_error('Connection REFUSED by peer') == web.FRIENDLY_ERRORS['connection refused']
+
+    def test_ibkr_mention(self):
+        assert 'Trader Workstation' in get_friendly_error('TWS went away')
+
+    def test_passthrough(self):
+        assert get_friendly_error('disk full') == 'Something went wrong: disk full'
+
+
+class TestIsMarketOpen:
+    def _at(self, monkeypatch, *args):
+        from datetime import datetime
+
+        class FixedDateTime(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return datetime(*args, tzinfo=tz)
+
+        monkeypatch.setattr(web, 'datetime', FixedDateTime)
+        return web.is_market_open()
+
+    def test_weekday_session(self, monkeypatch):
+        assert self._at(monkeypatch, 2024, 3, 12, 10, 0) is True   # Tuesday
+        assert self._at(monkeypatch, 2024, 3, 12, 9, 29) is False
+        assert self._at(monkeypatch, 2024, 3, 12, 16, 1) is False
+
+    def test_weekend(self, monkeypatch):
+        assert self._at(monkeypatch, 2024, 3, 16, 12, 0) is False  # Saturday
+
+
+class TestMarketFields:
+    def test_derived_fields(self):
+        data = market_fields('AAPL', {'last': 110.0, 'change': 10.0,
+                                      'close': 100.0, 'open': 102.0}, {})
+        assert data['daily_change_pct'] == pytest.approx(0.1)
+        assert data['opening_gap'] == pytest.approx(2.0)
+        assert data['source'] == 'ibkr'
+        assert data['data_age'] == ''
+
+    def test_garbage_values_become_zero(self):
+        data = market_fields('AAPL', {'last': float('nan'), 'change': None}, {})
+        assert data['current_price'] == 0
+        assert data['daily_change_pct'] == 0
+
+    def test_cached_age_uses_given_clock(self):
+        from datetime import datetime
+        data = market_fields('AAPL', {'last': 1.0, 'source': 'cached',
+                                      'timestamp': '2024-03-12T10:00:00'}, {},
+                             now=datetime(2024, 3, 12, 12, 30))
+        assert data['data_age'] == '2h ago'
+
+    def test_source_falls_back_to_data_sources(self):
+        data = market_fields('AAPL', {'last': 1.0}, {'AAPL': 'yahoo'})
+        assert data['source'] == 'yahoo'
+
+
+class TestEnhanceWithMarketData:
+    def _basic(self):
+        return {
+            'market_data': {'AAPL': {'last': 110.0, 'change': 10.0, 'close': 100.0, 'open': 100.0}},
+            'data_sources': {'AAPL': 'ibkr'},
+            'positions': [{'symbol': 'AAPL', 'shares': 200, 'avgCost': 90.0, 'naked_puts': 0,
+                           'covered_calls': 1, 'uncovered_calls': 0}],
+            'incomplete_lots': [{'symbol': 'AAPL', 'shares': 50, 'avgCost': 95.0}],
+            'watchlist': ['NVDA'],
+        }
+
+    def test_row_shapes(self):
+        result = enhance_with_market_data(self._basic())
+        assert len(result['positions'][0]) == 15
+        assert len(result['incomplete_lots'][0]) == 11
+        assert len(result['watchlist'][0]) == 9
+        assert result['positions'][0][12] == 100  # 200 shares - 1 covered call
+
+    def test_sections_sorted_by_symbol(self):
+        basic = self._basic()
+        basic['watchlist'] = ['nvda', 'AMD', 'Msft']
+        result = enhance_with_market_data(basic)
+        assert [row[0] for row in result['watchlist']] == ['AMD', 'Msft', 'nvda']
+
+    def test_summary_tallies_positions(self):
+        basic = self._basic()
+        basic['positions'].append({'symbol': 'TSLA', 'shares': 100, 'avgCost': 1.0, 'naked_puts': 0,
+                                   'covered_calls': 0, 'uncovered_calls': 0})
+        basic['market_data']['TSLA'] = {'last': 95.0, 'change': -5.0}
+        summary = enhance_with_market_data(basic)['summary']
+        assert summary == {'gainers': 1, 'losers': 1, 'daily_pl': 1500.0}
+
+    def test_symbol_in_two_sections_shares_quote(self):
+        result = enhance_with_market_data(self._basic())
+        assert result['positions'][0][2] == result['incomplete_lots'][0][2] == 110.0
+        assert result['watchlist'][0][1] == 0
+
+
+class TestStaticFingerprints:
+    def test_url_carries_content_hash(self):
+        with web.app.test_request_context():
+            from flask import url_for
+            url = url_for('static', filename='js/app.js')
+        assert f'?v={web.static_fingerprint("js/app.js")}' in url
+
+    def test_fingerprinted_asset_is_immutable(self):
+        client = web.app.test_client()
+        fingerprint = web.static_fingerprint('css/styles.css')
+        response = client.get(f'/static/css/styles.css?v={fingerprint}')
+        assert 'immutable' in response.headers['Cache-Control']
+        response.close()
+
+    def test_stale_fingerprint_is_not_immutable(self):
+        client = web.app.test_client()
+        response = client.get('/static/css/styles.css?v=1')
+        assert 'immutable' not in response.headers.get('Cache-Control', '')
+        response.close()
+
+    def test_unversioned_asset_is_not_immutable(self):
+        client = web.app.test_client()
+        response = client.get('/static/css/styles.css')
+        assert 'immutable' not in response.headers.get('Cache-Control', '')
+        response.close()
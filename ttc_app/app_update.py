@@ -11,8 +11,8 @@ import json
 import logging
 import os
 import platform
+import re
 import ssl
-import subprocess
 import sys
 import tempfile
 import urllib.error
@@ -45,15 +45,22 @@ UPDATE_DIR_NAME = 'ttc_update'
 FAIL_MARKER_NAME = 'update_failed.txt'
 OLD_EXE_SUFFIX = '.old.exe'
 
+CHUNK_SIZE = 1024 * 1024  # download/hash read size
+
+
+_VERSION_RE = re.compile(r'v?(\d+)(?:\.(\d+))?(?:\.(\d+))?')
+
 
 def parse_version(version_str):
-    """Parse version string into tuple for comparison"""
-    try:
-        v = str(version_str).lstrip('v')
-        parts = v.split('.')
-        return tuple(int(p) for p in parts[:3])
-    except Exception:
+    """Parse version string into tuple for comparison.
+
+    Only the leading numeric part counts, so a suffixed tag like
+    "v2.0.4-rc1" compares as (2, 0, 4) instead of collapsing to (0, 0, 0),
+    and "2.3" pads to (2, 3, 0)."""
+    m = _VERSION_RE.match(str(version_str).strip())
+    if not m:
         return (0, 0, 0)
+    return tuple(int(p or 0) for p in m.groups())
 
 
 def _update_dir():
@@ -62,8 +69,8 @@ def _update_dir():
     return path
 
 
-def _http_get(url, user_agent, timeout=10):
-    request = urllib.request.Request(url, headers={'User-Agent': user_agent})
+def _http_get(url, user_agent, timeout=10, headers=None):
+    request = urllib.request.Request(url, headers={'User-Agent': user_agent, **(headers or {})})
     return urllib.request.urlopen(request, timeout=timeout, context=_SSL_CONTEXT)
 
 
@@ -90,12 +97,50 @@ def select_asset(assets, system=None):
     return None
 
 
-def check_for_updates(app_version, user_agent):
-    """Check GitHub for available updates (non-blocking)"""
+def fetch_latest_release(user_agent, cache=None):
+    """Fetch the latest release JSON from the GitHub API.
+
+    `cache` is an optional dict kept by the caller between runs. When it
+    holds an ETag from an earlier fetch, the request is conditional and a
+    304 Not Modified (no body, not counted against GitHub's rate limit)
+    reuses the cached release. The dict is updated in place."""
+    headers = {}
+    if cache and cache.get('url') == GITHUB_API_URL and cache.get('release'):
+        headers['If-None-Match'] = cache['etag']
+    try:
+        with _http_get(GITHUB_API_URL, user_agent, timeout=5, headers=headers) as response:
+            data = json.loads(response.read())
+            etag = response.headers.get('ETag')
+    except urllib.error.HTTPError as e:
+        if e.code == 304 and headers:
+            logger.info('Latest release unchanged since last check')
+            return cache['release']
+        raise
+
+    if cache is not None:
+        cache.clear()
+        if etag:
+            cache.update({
+                'url': GITHUB_API_URL,
+                'etag': etag,
+                'release': {
+                    'tag_name': data.get('tag_name'),
+                    'body': data.get('body', ''),
+                    'html_url': data.get('html_url', ''),
+                    'assets': [{'name': a.get('name'),
+                                'browser_download_url': a.get('browser_download_url')}
+                               for a in data.get('assets', [])],
+                },
+            })
+    return data
+
+
+def check_for_updates(app_version, user_agent, cache=None):
+    """Check GitHub for available updates (non-blocking). See
+    fetch_latest_release() for `cache`."""
     try:
         logger.info('Checking for updates...')
-        with _http_get(GITHUB_API_URL, user_agent, timeout=5) as response:
-            data = json.loads(response.read().decode('utf-8'))
+        data = fetch_latest_release(user_agent, cache)
 
         latest_version = data.get('tag_name', '0.0.0')
         if parse_version(latest_version) <= parse_version(app_version):
@@ -105,11 +150,8 @@ def check_for_updates(app_version, user_agent):
         logger.info(f'Update available: {app_version} -> {latest_version}')
         assets = data.get('assets', [])
         asset = select_asset(assets)
-        checksums_url = None
-        for a in assets:
-            if a.get('name') == CHECKSUMS_ASSET:
-                checksums_url = a.get('browser_download_url')
-                break
+        checksums_url = next((a.get('browser_download_url') for a in assets
+                              if a.get('name') == CHECKSUMS_ASSET), None)
 
         return {
             'available': True,
@@ -146,7 +188,7 @@ def parse_checksums(text):
 def sha256_of_file(path):
     digest = hashlib.sha256()
     with open(path, 'rb') as f:
-        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
             digest.update(chunk)
     return digest.hexdigest()
 
@@ -189,10 +231,11 @@ def download_update(download_url, asset_name, user_agent):
             last_logged_decile = -1
 
             with open(download_path, 'wb') as f:
-                while True:
-                    chunk = response.read(8192)
-                    if not chunk:
-                        break
+                if total_size > 0:
+                    # Reserve the full size up front so the filesystem can
+                    # allocate it in one go rather than growing it per chunk
+                    f.truncate(total_size)
+                for chunk in iter(lambda: response.read(CHUNK_SIZE), b''):
                     f.write(chunk)
                     downloaded += len(chunk)
                     if total_size > 0:
@@ -201,6 +244,11 @@ def download_update(download_url, asset_name, user_agent):
                             last_logged_decile = decile
                             logger.info(f'Download progress: {decile * 10}%')
 
+        # A preallocated file is full-size even if the stream was cut short
+        if total_size > 0 and downloaded != total_size:
+            logger.error(f'Download incomplete: {downloaded} of {total_size} bytes')
+            return None
+
         logger.info(f'Download complete: {download_path}')
         return download_path
 
@@ -255,6 +303,8 @@ def install_update(installer_path, cleanup_callback=None):
     Windows (frozen): stage the batch helper and exit; the helper replaces the
     exe at sys.executable and relaunches. Mac: open the DMG for manual install.
     """
+    import subprocess
+
     try:
         logger.info(f'Installing update: {installer_path}')
 
@@ -304,12 +354,14 @@ def check_post_update_state(app_dir):
     Returns the marker text if the last update failed, else None."""
     marker = os.path.join(app_dir, FAIL_MARKER_NAME)
     message = None
-    if os.path.exists(marker):
-        try:
-            with open(marker, 'r') as f:
-                message = f.read().strip()
-        except Exception:
-            message = 'The last update could not be applied.'
+    try:
+        with open(marker, 'r') as f:
+            message = f.read().strip()
+    except FileNotFoundError:
+        pass
+    except Exception:
+        message = 'The last update could not be applied.'
+    if message is not None:
         try:
             os.remove(marker)
         except Exception:
@@ -319,11 +371,10 @@ def check_post_update_state(app_dir):
     # Remove the pre-update backup left by a successful swap
     if getattr(sys, 'frozen', False):
         backup = sys.executable + OLD_EXE_SUFFIX
-        if os.path.exists(backup):
-            try:
-                os.remove(backup)
-                logger.info('Removed previous-version backup after successful update')
-            except Exception:
-                pass
+        try:
+            os.remove(backup)
+            logger.info('Removed previous-version backup after successful update')
+        except Exception:
+            pass
 
     return message
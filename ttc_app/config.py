@@ -19,6 +19,10 @@ USER_AGENT = f'{APP_NAME}/{APP_VERSION}'
 
 DEFAULT_PORT = 8082
 MAX_PORT_TRIES = 10
+# waitress worker threads. /api/data can block for the whole IBKR snapshot
+# (up to its 25s timeout), so leave room for static files, /api/status and
+# the other tabs while a slow refresh is in flight.
+SERVER_THREADS = 8
 
 if getattr(sys, 'frozen', False):
     APP_DIR = os.path.dirname(sys.executable)
@@ -50,9 +54,16 @@ def _default_data_dir():
 DATA_DIR = _default_data_dir()
 DB_PATH = os.path.join(DATA_DIR, 'ttc.db')
 
+# Dated log folders, next to the app so they're easy to send back
+LOG_DIR = os.path.join(APP_DIR, 'log')
+
 # Legacy JSON files in APP_DIR, imported into the DB on first run
 LEGACY_WATCHLIST_FILE = os.path.join(APP_DIR, 'ttc_watchlist.json')
 LEGACY_PRICE_CACHE_FILE = os.path.join(APP_DIR, 'price_cache.json')
 LEGACY_QUAL_FAILURES_FILE = os.path.join(APP_DIR, 'qual_failures.json')
 LEGACY_SETTINGS_FILE = os.path.join(APP_DIR, 'app_settings.json')
 VERSION_FILE = os.path.join(APP_DIR, 'version.json')
+
+# Pre-2.3.0 runtime-generated UI directory, moved aside at startup
+LEGACY_RESOURCES_DIR = os.path.join(APP_DIR, 'resources')
+LEGACY_RESOURCES_BACKUP_DIR = os.path.join(APP_DIR, 'resources_old_backup')
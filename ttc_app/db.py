@@ -137,6 +137,7 @@ class Database:
         os.makedirs(os.path.dirname(self.path), exist_ok=True)
         fresh = not os.path.exists(self.path)
         self._lock = threading.Lock()
+        self._watchlist = None  # in-memory copy; set_watchlist() is the only writer
         self._conn = sqlite3.connect(self.path, check_same_thread=False)
         self._conn.row_factory = sqlite3.Row
         self._conn.execute('PRAGMA journal_mode=WAL')
@@ -226,14 +227,24 @@ class Database:
     # ---------- watchlist (mirrored to legacy JSON for rollback safety) ----------
 
     def get_watchlist(self):
-        return self.get_setting('watchlist', ['AAPL', 'NVDA'])
+        if self._watchlist is None:
+            self._watchlist = self.get_setting('watchlist', ['AAPL', 'NVDA'])
+        return list(self._watchlist)
 
     def set_watchlist(self, symbols):
+        """Store the watchlist; a no-op when the symbol set is unchanged."""
         symbols = sorted(set(symbols))
+        if symbols == self.get_watchlist():
+            return
         self.set_setting('watchlist', symbols)
+        self._watchlist = symbols
+        # Write-then-rename so a crash (or Dropbox syncing mid-write) never
+        # leaves a truncated mirror behind.
+        tmp_path = config.LEGACY_WATCHLIST_FILE + '.tmp'
         try:
-            with open(config.LEGACY_WATCHLIST_FILE, 'w') as f:
-                json.dump({'WATCHLIST': symbols}, f, indent=4)
+            with open(tmp_path, 'w') as f:
+                json.dump({'WATCHLIST': symbols}, f, separators=(',', ':'))
+            os.replace(tmp_path, config.LEGACY_WATCHLIST_FILE)
         except Exception as e:
             logger.debug(f'Could not mirror watchlist to JSON: {e}')
 
@@ -10,6 +10,7 @@
 import asyncio
 import logging
 import math
+import operator
 import random
 import select
 import socket
@@ -39,6 +40,9 @@ CLIENT_ID_RETRIES = 3     # fresh random ids to try on 'client id in use'
 FIRST_PRICE_DEADLINE = 5  # seconds to wait for a new ticker's first price
 SNAPSHOT_MAX_AGE = 5      # seconds a snapshot stays fresh for coalescing
 
+# Ticker is a plain dataclass, so one attrgetter call reads every price field
+_TICKER_FIELDS = operator.attrgetter('open', 'close', 'high', 'low', 'last')
+
 
 class IBKRUnavailableError(Exception):
     """Base class for IBKR connection failures classified by root cause."""
@@ -89,55 +93,89 @@ def probe_ib_ports(endpoints=None, timeout=None):
     if timeout is None:
         timeout = PROBE_TIMEOUT
 
-    results = []
-    for host, port, label in endpoints:
+    # Start every connect first, then wait on all of them in one select()
+    # loop, so a filtered port costs one PROBE_TIMEOUT for the whole sweep
+    # rather than one per endpoint.
+    results = [None] * len(endpoints)
+    pending = {}  # socket -> (index, start time)
+    for index, (host, port, label) in enumerate(endpoints):
         start = time.time()
         sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         sock.setblocking(False)
-        reachable = False
-        err_code = None
-        err_msg = None
         try:
             err_code = sock.connect_ex((host, port))
-            if err_code == 0:
-                reachable = True
-            else:
-                _, writable, exceptional = select.select([], [sock], [sock], timeout)
-                if writable or exceptional:
-                    err_code = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
-                    reachable = (err_code == 0)
-                else:
-                    err_code = -1
-                    err_msg = 'timeout'
         except Exception as e:
-            err_code = -1
-            err_msg = str(e)
-        finally:
+            results[index] = _probe_result(endpoints[index], start, -1, str(e))
+            _close_quietly(sock)
+            continue
+        if err_code == 0:
+            results[index] = _probe_result(endpoints[index], start, 0)
+            _close_quietly(sock)
+        else:
+            pending[sock] = (index, start)
+
+    deadline = time.time() + timeout
+    try:
+        while pending:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            socks = list(pending)
             try:
-                sock.close()
-            except Exception:
-                pass
-        latency_ms = int((time.time() - start) * 1000)
+                _, writable, exceptional = select.select([], socks, socks, remaining)
+            except (OSError, ValueError) as e:
+                # One shared select() now covers every endpoint, so report its
+                # failure against each one still pending rather than letting
+                # it escape and kill the reconnect loop.
+                for sock, (index, start) in pending.items():
+                    results[index] = _probe_result(endpoints[index], start, -1, str(e))
+                    _close_quietly(sock)
+                pending.clear()
+                break
+            if not writable and not exceptional:
+                break
+            for sock in set(writable) | set(exceptional):
+                index, start = pending.pop(sock)
+                try:
+                    err_code = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                    results[index] = _probe_result(endpoints[index], start, err_code)
+                except Exception as e:
+                    results[index] = _probe_result(endpoints[index], start, -1, str(e))
+                _close_quietly(sock)
+    finally:
+        for sock, (index, start) in pending.items():
+            results[index] = _probe_result(endpoints[index], start, -1, 'timeout')
+            _close_quietly(sock)
+    return results
 
-        if reachable:
-            results.append({
-                'host': host, 'port': port, 'label': label,
-                'reachable': True, 'latency_ms': latency_ms, 'error': None,
-            })
+
+def _probe_result(endpoint, start, err_code, err_msg=None):
+    host, port, label = endpoint
+    latency_ms = int((time.time() - start) * 1000)
+    if err_code == 0:
+        return {
+            'host': host, 'port': port, 'label': label,
+            'reachable': True, 'latency_ms': latency_ms, 'error': None,
+        }
+    if err_msg is None:
+        # WSAECONNREFUSED (Windows), ECONNREFUSED (Linux=111, macOS=61)
+        if err_code in (10061, 111, 61):
+            err_msg = 'connection refused'
+        elif err_code == -1:
+            err_msg = 'timeout'
         else:
-            if err_msg is None:
-                # WSAECONNREFUSED (Windows), ECONNREFUSED (Linux=111, macOS=61)
-                if err_code in (10061, 111, 61):
-                    err_msg = 'connection refused'
-                elif err_code == -1:
-                    err_msg = 'timeout'
-                else:
-                    err_msg = f'errno {err_code}'
-            results.append({
-                'host': host, 'port': port, 'label': label,
-                'reachable': False, 'latency_ms': latency_ms, 'error': err_msg,
-            })
-    return results
+            err_msg = f'errno {err_code}'
+    return {
+        'host': host, 'port': port, 'label': label,
+        'reachable': False, 'latency_ms': latency_ms, 'error': err_msg,
+    }
+
+
+def _close_quietly(sock):
+    try:
+        sock.close()
+    except Exception:
+        pass
 
 
 def classify_handshake_error(exc):
@@ -249,6 +287,10 @@ class IBKRManager:
         if self.state == 'connected':
             logger.warning('IBKR connection lost')
             self.state = 'reconnecting'
+            # Start reconnecting now rather than at the next heartbeat (up to
+            # HEARTBEAT_INTERVAL away); fires on the manager's own loop.
+            if self._retry_now_event is not None:
+                self._retry_now_event.set()
 
     # ---------- connection loop ----------
 
@@ -271,6 +313,11 @@ class IBKRManager:
                 self._safe_disconnect()
                 self.state = 'reconnecting'
                 continue
+            # A disconnect that landed while the heartbeat was in flight has
+            # already set (and _interruptible_sleep would clear) the retry
+            # event; reconnect now instead of idling a full interval.
+            if not self._ib.isConnected():
+                continue
             await self._interruptible_sleep(HEARTBEAT_INTERVAL)
 
     async def _interruptible_sleep(self, seconds):
@@ -447,12 +494,13 @@ class IBKRManager:
             option_positions = {}  # conId -> position info
             for position in positions:
                 contract = position.contract
+                avg_cost = float(position.avgCost) if position.avgCost else 0
                 positions_raw.append({
                     'symbol': contract.symbol,
                     'secType': contract.secType,
-                    'right': getattr(contract, 'right', ''),
+                    'right': contract.right,
                     'position': position.position,
-                    'avgCost': float(position.avgCost) if position.avgCost else 0,
+                    'avgCost': avg_cost,
                     'conId': contract.conId,
                 })
                 if contract.secType in ('STK', 'OPT'):
@@ -460,7 +508,7 @@ class IBKRManager:
                 if contract.secType == 'OPT' and position.position and contract.conId:
                     option_positions[contract.conId] = {
                         'position': position.position,
-                        'avgCost': float(position.avgCost) if position.avgCost else 0,
+                        'avgCost': avg_cost,
                         'symbol': contract.symbol,
                     }
 
@@ -470,16 +518,16 @@ class IBKRManager:
             now_str = datetime.now().isoformat()
             market_data = {}
             for symbol, ticker in self._tickers.items():
+                open_, close, high, low, last_trade = map(safe_price, _TICKER_FIELDS(ticker))
                 last = safe_price(ticker.marketPrice())
                 if last <= 0:
-                    last = safe_price(ticker.last) or safe_price(ticker.close)
-                close = safe_price(ticker.close)
+                    last = last_trade or close
                 market_data[symbol] = {
                     'last': last,
-                    'open': safe_price(ticker.open),
+                    'open': open_,
                     'close': close,
-                    'high': safe_price(ticker.high),
-                    'low': safe_price(ticker.low),
+                    'high': high,
+                    'low': low,
                     'change': (last - close) if (last and close) else 0,
                     'source': 'ibkr',
                     'timestamp': now_str,
@@ -545,12 +593,9 @@ class IBKRManager:
 
         # Wait for first data on new option tickers (greeks can lag the price)
         if new_tickers:
-            deadline = time.time() + FIRST_PRICE_DEADLINE
-            while time.time() < deadline:
-                if all(safe_price(t.marketPrice()) > 0 or t.modelGreeks
-                       for t in new_tickers):
-                    break
-                await asyncio.sleep(0.2)
+            await self._wait_for_first_data(
+                new_tickers,
+                lambda t: safe_price(t.marketPrice()) > 0 or t.modelGreeks)
 
         options = []
         today = datetime.now().date()
@@ -642,14 +687,40 @@ class IBKRManager:
 
         # Event-paced wait for first prices on newly subscribed tickers only
         if new_tickers:
-            deadline = time.time() + FIRST_PRICE_DEADLINE
-            while time.time() < deadline:
-                if all(safe_price(t.marketPrice()) > 0 for t in new_tickers):
-                    break
-                await asyncio.sleep(0.2)
+            await self._wait_for_first_data(
+                new_tickers, lambda t: safe_price(t.marketPrice()) > 0)
 
         return failed
 
+    async def _wait_for_first_data(self, tickers, is_ready):
+        """Wait until is_ready(ticker) holds for every ticker, or until
+        FIRST_PRICE_DEADLINE. Woken by pendingTickersEvent rather than a
+        fixed poll, so a batch of fresh subscriptions returns as soon as the
+        last first tick lands instead of on the next 200ms boundary."""
+        pending = [t for t in tickers if not is_ready(t)]
+        if not pending:
+            return
+        ticked = asyncio.Event()
+
+        def on_pending(_tickers):
+            ticked.set()
+
+        self._ib.pendingTickersEvent += on_pending
+        try:
+            deadline = time.time() + FIRST_PRICE_DEADLINE
+            while pending:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                try:
+                    await asyncio.wait_for(ticked.wait(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                ticked.clear()
+                pending = [t for t in pending if not is_ready(t)]
+        finally:
+            self._ib.pendingTickersEvent -= on_pending
+
     async def _qualify_many(self, symbols, failed):
         """Qualify many stock contracts in one batched, concurrent call;
         retry stragglers once without SMART for odd listings."""
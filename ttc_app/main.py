@@ -2,23 +2,24 @@
 # native window, and shutdown.
 
 import atexit
+import importlib.util
 import json
 import logging
 import os
 import platform
+import queue
 import signal
 import socket
 import sys
 import threading
-import time
-import webbrowser
 
 from datetime import datetime
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 
 from ttc_app import app_update
 from ttc_app.config import (
-    APP_DIR, APP_NAME, APP_VERSION, DEFAULT_PORT, MAX_PORT_TRIES, UI_DIR,
+    APP_DIR, APP_NAME, APP_VERSION, DEFAULT_PORT, LEGACY_RESOURCES_BACKUP_DIR,
+    LEGACY_RESOURCES_DIR, LOG_DIR, MAX_PORT_TRIES, SERVER_THREADS, UI_DIR,
     VERSION_FILE,
 )
 from ttc_app.db import Database
@@ -28,30 +29,51 @@ from ttc_app.web import app, state
 
 logger = logging.getLogger(__name__)
 
-try:
-    import webview
-    HAS_WEBVIEW = True
-except ImportError:
-    webview = None
-    HAS_WEBVIEW = False
+# Only check that pywebview is installed here; the import itself happens in
+# the background prewarm and create_native_window(), which falls back to the
+# browser if it fails.
+HAS_WEBVIEW = importlib.util.find_spec('webview') is not None
 
 shutdown_event = threading.Event()
+server_ready = threading.Event()
 _cleaned_up = False
+_log_listener = None
+_webview_prewarm = None
 
 
 def setup_logging():
-    log_dir = os.path.join(APP_DIR, 'log', datetime.now().strftime('%Y-%m-%d'))
+    log_dir = os.path.join(LOG_DIR, datetime.now().strftime('%Y-%m-%d'))
     os.makedirs(log_dir, exist_ok=True)
     logging.basicConfig(level=logging.INFO,
                         format='%(asctime)s - %(levelname)s - %(message)s')
     handler = RotatingFileHandler(
         os.path.join(log_dir, 'ttc_positions_app.log'),
-        maxBytes=1 * 1024 * 1024, backupCount=5)
+        maxBytes=10 * 1024 * 1024, backupCount=2)
     handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
-    logging.getLogger().addHandler(handler)
+    # The log file lives in the Dropbox folder; hand records to one writer
+    # thread so Flask and IBKR threads never wait on the rotation check and
+    # the write+flush.
+    global _log_listener
+    log_queue = queue.SimpleQueue()
+    _log_listener = QueueListener(log_queue, handler)
+    _log_listener.start()
+    atexit.register(stop_logging)
+    logging.getLogger().addHandler(QueueHandler(log_queue))
+
+
+def stop_logging():
+    """Drain queued records to the log file and stop the writer thread."""
+    global _log_listener
+    listener, _log_listener = _log_listener, None
+    if listener is not None:
+        listener.stop()
 
 
 def find_available_port(start_port=DEFAULT_PORT, max_tries=MAX_PORT_TRIES):
+    # Deliberately a scan up from a fixed port rather than bind(('', 0)):
+    # localStorage (dark mode, column layout, sort prefs) is scoped to the
+    # origin including the port, so a kernel-picked port would reset every
+    # UI preference on each launch. The first try almost always succeeds.
     for port in range(start_port, start_port + max_tries):
         with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
             try:
@@ -66,13 +88,12 @@ def archive_legacy_resources():
     """The pre-2.3.0 app wrote its UI into APP_DIR/resources and preferred it
     over the bundled copy. That directory would now only confuse (and it syncs
     through Dropbox), so move it aside once."""
-    legacy = os.path.join(APP_DIR, 'resources')
-    if os.path.isdir(legacy):
-        backup = os.path.join(APP_DIR, 'resources_old_backup')
+    if os.path.isdir(LEGACY_RESOURCES_DIR):
+        backup = LEGACY_RESOURCES_BACKUP_DIR
         try:
             if os.path.exists(backup):
                 backup = backup + '_' + datetime.now().strftime('%Y%m%d%H%M%S')
-            os.rename(legacy, backup)
+            os.rename(LEGACY_RESOURCES_DIR, backup)
             logger.info(f'Archived legacy resources dir to {backup}')
         except OSError as e:
             logger.warning(f'Could not archive legacy resources dir: {e}')
@@ -80,12 +101,12 @@ def archive_legacy_resources():
 
 def record_version_transition():
     previous_version = None
-    if os.path.exists(VERSION_FILE):
-        try:
-            with open(VERSION_FILE, 'r') as f:
-                previous_version = json.load(f).get('app_version')
-        except Exception:
-            pass
+    try:
+        with open(VERSION_FILE, 'r') as f:
+            previous_version = json.load(f).get('app_version')
+    except (OSError, ValueError, AttributeError) as e:
+        # Missing on first run; unreadable or not a JSON object otherwise.
+        logger.debug(f'No previous version info: {e}')
     if previous_version and app_update.parse_version(previous_version) < app_update.parse_version(APP_VERSION):
         logger.info(f'Updated from v{previous_version} to v{APP_VERSION}')
         state.startup_messages.append((f'Updated to v{APP_VERSION}', 'success'))
@@ -127,6 +148,13 @@ def cleanup():
     logger.info('Cleanup complete')
 
 
+def cleanup_before_update():
+    """The updater leaves via os._exit(), which skips atexit handlers, so
+    flush the log queue here as well."""
+    cleanup()
+    stop_logging()
+
+
 def signal_handler(signum, frame):
     logger.info(f'Received signal {signum}, shutting down...')
     cleanup()
@@ -134,15 +162,57 @@ def signal_handler(signum, frame):
 
 
 def run_server(port):
-    from waitress import serve
+    from waitress import create_server
     logger.info(f'Starting server on port {port}...')
-    serve(app, host='127.0.0.1', port=port, threads=4)
+    # create_server() binds and listens before returning, so from here on a
+    # connection is queued by the OS even before the serve loop starts.
+    server = create_server(app, host='127.0.0.1', port=port, threads=SERVER_THREADS)
+    server_ready.set()
+    server.run()
+
+
+def wait_for_server(port, timeout=5.0):
+    """Block until the server socket is listening (or timeout), so the window
+    opens as soon as it can load instead of after a fixed guess."""
+    if server_ready.wait(timeout):
+        return True
+    logger.warning(f'Server on port {port} not ready after {timeout}s')
+    return False
+
+
+def _prewarm_webview():
+    # Importing pywebview (and, on Windows, loading the .NET runtime through
+    # pythonnet) is the slow part of opening the window. Doing it here, while
+    # the DB, IBKR manager and server start up, takes it off the critical path.
+    try:
+        import webview  # noqa: F401
+        if sys.platform == 'win32':
+            import clr  # noqa: F401
+    except Exception as e:
+        logger.debug(f'webview prewarm failed, will import on demand: {e}')
+
+
+def start_webview_prewarm():
+    global _webview_prewarm
+    _webview_prewarm = threading.Thread(target=_prewarm_webview, daemon=True)
+    _webview_prewarm.start()
 
 
 def create_native_window(port):
+    if _webview_prewarm is not None:
+        _webview_prewarm.join()
+    try:
+        import webview
+    except ImportError as e:
+        # Installed but broken (e.g. a dependency missing from the frozen
+        # build): still give the user a UI.
+        logger.warning(f'pywebview failed to import ({e}), opening in browser instead')
+        open_in_browser(port)
+        return
+
     url = f'http://127.0.0.1:{port}'
     logger.info(f'Creating native window for URL: {url}')
-    time.sleep(1)
+    wait_for_server(port)
     window = webview.create_window(
         APP_NAME, url, width=1400, height=900, min_size=(800, 600),
         confirm_close=False, text_select=True)
@@ -158,16 +228,21 @@ def create_native_window(port):
 
 
 def open_in_browser(port):
+    import webbrowser
+
     url = f'http://127.0.0.1:{port}'
-    time.sleep(1)
+    wait_for_server(port)
     webbrowser.open(url)
     try:
         print(f"\n{'=' * 50}")
         print(f"TTC Positions Report is running at: {url}")
         print("Press Ctrl+C to stop the server")
         print(f"{'=' * 50}\n")
-        while not shutdown_event.is_set():
-            time.sleep(1)
+        # Returns the moment cleanup() sets the event. Still a bounded wait:
+        # on Windows an untimed Event.wait() can't be interrupted by Ctrl+C,
+        # so the SIGINT handler would never get a chance to run.
+        while not shutdown_event.wait(1):
+            pass
     except KeyboardInterrupt:
         pass
 
@@ -178,11 +253,13 @@ def main():
     logger.info(f'App directory: {APP_DIR}')
     logger.info(f'UI directory: {UI_DIR}')
     logger.info(f'Platform: {platform.system()} {platform.release()}')
+    if HAS_WEBVIEW:
+        start_webview_prewarm()
 
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
     atexit.register(cleanup)
-    state.cleanup = cleanup
+    state.cleanup = cleanup_before_update
 
     record_version_transition()
     archive_legacy_resources()
@@ -207,6 +284,7 @@ def main():
         logger.error(f'Could not find available port: {e}')
         sys.exit(1)
 
+    web.preload_templates()
     server_thread = threading.Thread(target=run_server, args=(port,), daemon=True)
     server_thread.start()
     logger.info(f'Server thread started on port {port}')
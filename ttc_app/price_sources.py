@@ -1,15 +1,39 @@
 # External price sources and symbol helpers.
 # Fallback chain (after IBKR): Yahoo Finance -> Cboe delayed quotes -> disk cache.
 
+import http.client
 import json
 import logging
+import re
 import ssl
+import threading
+import time
 import urllib.error
-import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
 
 logger = logging.getLogger(__name__)
 
 USER_AGENT = 'TTC-Positions-Report'
+# Yahoo answers non-browser User-Agents like ours with 401/429 far more often
+# than a regular desktop browser string, which pushed refreshes onto the
+# slower Cboe/cached fallbacks for no reason.
+YAHOO_USER_AGENT = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+                    '(KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36')
+
+# Per-symbol quote requests are pure network wait, so a handful run at once;
+# kept small so a fallback refresh doesn't look like a burst to the provider.
+MAX_FETCH_WORKERS = 8
+
+# A fallback quote is reused for this long, so rapid refreshes while IBKR is
+# down don't re-request every symbol from Yahoo/Cboe each time.
+QUOTE_CACHE_SECONDS = 60
+# Outside regular hours a quote barely moves, so the same reuse window can be
+# much longer (callers pass this as max_age when the market is closed).
+CLOSED_MARKET_QUOTE_CACHE_SECONDS = 15 * 60
+# After Yahoo rate-limits us (HTTP 429), skip it for this long and let the
+# chain drop through to Cboe instead of hammering it on every refresh.
+YAHOO_BACKOFF_SECONDS = 120
 
 # Use certifi's CA bundle when available (needed on macOS dev setups where
 # Python lacks system certs); production Windows uses the OS cert store.
@@ -20,76 +44,178 @@ except ImportError:
     _SSL_CONTEXT = ssl.create_default_context()
 
 
-def _urlopen(req, timeout):
-    return urllib.request.urlopen(req, timeout=timeout, context=_SSL_CONTEXT)
+# Each fetch worker keeps one HTTPS connection per host open between requests
+# (urlopen would redo the TCP + TLS handshake for every symbol). The pool is
+# long-lived so those connections also carry over from one refresh to the next.
+_fetch_pool = ThreadPoolExecutor(max_workers=MAX_FETCH_WORKERS, thread_name_prefix='quote-fetch')
+_connections = threading.local()
+
+
+def _connection(host, timeout):
+    conns = getattr(_connections, 'by_host', None)
+    if conns is None:
+        conns = _connections.by_host = {}
+    conn = conns.get(host)
+    if conn is None:
+        conn = conns[host] = http.client.HTTPSConnection(host, timeout=timeout, context=_SSL_CONTEXT)
+    return conn
+
+
+def _drop_connection(host):
+    conn = _connections.by_host.pop(host, None)
+    if conn is not None:
+        conn.close()
+
+
+def _get_json(url, headers, timeout=5):
+    """GET url over this thread's keep-alive connection and decode the JSON body.
+    Raises urllib.error.HTTPError on a non-200 status."""
+    parts = urlsplit(url)
+    path = parts.path + ('?' + parts.query if parts.query else '')
+    for attempt in range(2):
+        conn = _connection(parts.netloc, timeout)
+        try:
+            conn.request('GET', path, headers=headers)
+            response = conn.getresponse()
+            body = response.read()
+            break
+        except http.client.InvalidURL:
+            raise  # rejected before anything was sent; the connection is fine
+        except TimeoutError:
+            _drop_connection(parts.netloc)  # slow server, not a stale socket
+            raise
+        except (http.client.BadStatusLine, http.client.ImproperConnectionState, OSError):
+            # Usually the server closed the idle connection since our last
+            # request (RemoteDisconnected is a BadStatusLine); reconnect once
+            # before giving up.
+            _drop_connection(parts.netloc)
+            if attempt:
+                raise
+        except Exception:
+            _drop_connection(parts.netloc)  # e.g. timeout mid-response: unusable
+            raise
+    if response.status != 200:
+        raise urllib.error.HTTPError(url, response.status, response.reason, response.headers, None)
+    return json.loads(body.decode('utf-8'))
+
+
+# 8+ characters with at least three digits anywhere; real stock tickers
+# rarely have 3+ digits. One C-level match instead of a per-character loop.
+_CUSIP_RE = re.compile(r'(?=.{8})(?:\D*\d){3}', re.DOTALL)
 
 
 def is_cusip(symbol):
     """Check if a symbol looks like a CUSIP identifier (bonds).
     CUSIPs are 9-character alphanumeric with digits mixed in."""
-    if len(symbol) < 8:
-        return False
-    digit_count = sum(1 for c in symbol if c.isdigit())
-    return digit_count >= 3  # Real stock tickers rarely have 3+ digits
+    return _CUSIP_RE.match(symbol) is not None
+
+
+_quote_cache = {}  # (source, symbol) -> (monotonic fetched_at, price dict)
+_quote_cache_lock = threading.Lock()
+_yahoo_backoff_until = 0.0
+
+
+def _cached_quotes(source, symbols, max_age=QUOTE_CACHE_SECONDS):
+    """Split symbols into ({symbol: fresh cached quote}, [symbols to fetch])."""
+    now = time.monotonic()
+    hits, misses = {}, []
+    with _quote_cache_lock:
+        for symbol in symbols:
+            entry = _quote_cache.get((source, symbol))
+            if entry and now - entry[0] < max_age:
+                hits[symbol] = dict(entry[1])  # callers annotate their copy
+            else:
+                misses.append(symbol)
+    return hits, misses
+
 
+def _store_quotes(source, quotes):
+    now = time.monotonic()
+    with _quote_cache_lock:
+        for symbol, quote in quotes.items():
+            _quote_cache[(source, symbol)] = (now, dict(quote))  # caller keeps the original
 
-def fetch_yahoo_prices(symbols, user_agent=USER_AGENT):
-    """Fetch price data from Yahoo Finance for multiple symbols.
+
+def _fetch_concurrently(fetch_one, symbols):
+    """Run fetch_one(symbol) across symbols on the fetch pool; returns
+    {symbol: result} for the calls that returned something."""
+    if not symbols:
+        return {}
+    fetched = _fetch_pool.map(fetch_one, symbols)
+    return {s: r for s, r in zip(symbols, fetched) if r}
+
+
+def _fetch_yahoo_quote(symbol, user_agent):
+    """One v8 chart request; returns our price dict or None."""
+    try:
+        url = f'https://query1.finance.yahoo.com/v8/finance/chart/{symbol}?range=1d&interval=1d'
+        data = _get_json(url, {
+            'User-Agent': user_agent,
+            'Accept': 'application/json'
+        })
+
+        chart = data.get('chart', {}).get('result', [])
+        if chart:
+            meta = chart[0].get('meta', {})
+            current_price = meta.get('regularMarketPrice', 0)
+            prev_close = meta.get('chartPreviousClose', 0) or meta.get('previousClose', 0)
+
+            # Try to get OHLC from indicators
+            indicators = chart[0].get('indicators', {}).get('quote', [{}])
+            quote = indicators[0] if indicators else {}
+            opens = quote.get('open', [])
+            highs = quote.get('high', [])
+            lows = quote.get('low', [])
+
+            open_price = opens[-1] if opens and opens[-1] is not None else current_price
+            high_price = highs[-1] if highs and highs[-1] is not None else current_price
+            low_price = lows[-1] if lows and lows[-1] is not None else current_price
+            close_price = prev_close if prev_close else current_price
+
+            change = current_price - close_price if close_price else 0
+
+            if current_price and current_price > 0:
+                return {
+                    'last': current_price,
+                    'open': open_price,
+                    'close': close_price,
+                    'high': high_price,
+                    'low': low_price,
+                    'change': change,
+                    'source': 'yahoo'
+                }
+    except urllib.error.HTTPError as e:
+        if e.code == 429:
+            global _yahoo_backoff_until
+            _yahoo_backoff_until = time.monotonic() + YAHOO_BACKOFF_SECONDS
+        logger.debug(f'Yahoo Finance HTTP error for {symbol}: {e.code}')
+    except Exception as e:
+        logger.debug(f'Yahoo Finance error for {symbol}: {e}')
+    return None
+
+
+def fetch_yahoo_prices(symbols, user_agent=YAHOO_USER_AGENT, max_age=QUOTE_CACHE_SECONDS):
+    """Fetch price data from Yahoo Finance for multiple symbols, reusing
+    quotes fetched within the last max_age seconds.
     Returns dict of {symbol: {last, open, close, high, low, change, source}}"""
     if not symbols:
         return {}
 
-    results = {}
     # Filter out non-stock symbols (CUSIPs, bonds)
     valid_symbols = [s for s in symbols if not is_cusip(s)]
     if not valid_symbols:
         return {}
 
-    # Use the v8 chart endpoint for each symbol (more reliable than v7 quote)
-    for symbol in valid_symbols:
-        try:
-            url = f'https://query1.finance.yahoo.com/v8/finance/chart/{symbol}?range=1d&interval=1d'
-            req = urllib.request.Request(url, headers={
-                'User-Agent': user_agent,
-                'Accept': 'application/json'
-            })
-            with _urlopen(req, timeout=5) as response:
-                data = json.loads(response.read().decode('utf-8'))
-
-            chart = data.get('chart', {}).get('result', [])
-            if chart:
-                meta = chart[0].get('meta', {})
-                current_price = meta.get('regularMarketPrice', 0)
-                prev_close = meta.get('chartPreviousClose', 0) or meta.get('previousClose', 0)
-
-                # Try to get OHLC from indicators
-                indicators = chart[0].get('indicators', {}).get('quote', [{}])
-                quote = indicators[0] if indicators else {}
-                opens = quote.get('open', [])
-                highs = quote.get('high', [])
-                lows = quote.get('low', [])
-
-                open_price = opens[-1] if opens and opens[-1] is not None else current_price
-                high_price = highs[-1] if highs and highs[-1] is not None else current_price
-                low_price = lows[-1] if lows and lows[-1] is not None else current_price
-                close_price = prev_close if prev_close else current_price
-
-                change = current_price - close_price if close_price else 0
-
-                if current_price and current_price > 0:
-                    results[symbol] = {
-                        'last': current_price,
-                        'open': open_price,
-                        'close': close_price,
-                        'high': high_price,
-                        'low': low_price,
-                        'change': change,
-                        'source': 'yahoo'
-                    }
-        except urllib.error.HTTPError as e:
-            logger.debug(f'Yahoo Finance HTTP error for {symbol}: {e.code}')
-        except Exception as e:
-            logger.debug(f'Yahoo Finance error for {symbol}: {e}')
+    # One v8 chart request per symbol (more reliable than v7 quote, whose
+    # multi-symbol form now requires a cookie+crumb handshake), issued
+    # concurrently rather than back to back.
+    results, to_fetch = _cached_quotes('yahoo', valid_symbols, max_age)
+    if to_fetch and time.monotonic() < _yahoo_backoff_until:
+        logger.debug(f'Yahoo Finance rate-limited; skipping {len(to_fetch)} symbols')
+    elif to_fetch:
+        fetched = _fetch_concurrently(lambda s: _fetch_yahoo_quote(s, user_agent), to_fetch)
+        _store_quotes('yahoo', fetched)
+        results.update(fetched)
 
     if results:
         logger.info(f'Yahoo Finance fallback: got prices for {len(results)}/{len(valid_symbols)} symbols')
@@ -117,33 +243,37 @@ def parse_cboe_quote(payload):
     }
 
 
-def fetch_cboe_prices(symbols, user_agent=USER_AGENT):
-    """Fetch delayed quotes from Cboe's public CDN (keyless, ~15 min delayed).
+def _fetch_cboe_quote(symbol, user_agent):
+    """One Cboe delayed-quote request; returns our price dict or None."""
+    try:
+        # Request the symbol as-is: stripping suffixes like .TEN would
+        # silently return the price of a different security.
+        cboe_symbol = symbol.upper()
+        url = f'https://cdn.cboe.com/api/global/delayed_quotes/quotes/{cboe_symbol}.json'
+        payload = _get_json(url, {
+            'User-Agent': user_agent,
+            'Accept': 'application/json',
+        })
+        return parse_cboe_quote(payload)
+    except urllib.error.HTTPError as e:
+        logger.debug(f'Cboe HTTP error for {symbol}: {e.code}')
+    except Exception as e:
+        logger.debug(f'Cboe error for {symbol}: {e}')
+    return None
+
+
+def fetch_cboe_prices(symbols, user_agent=USER_AGENT, max_age=QUOTE_CACHE_SECONDS):
+    """Fetch delayed quotes from Cboe's public CDN (keyless, ~15 min delayed),
+    reusing quotes fetched within the last max_age seconds.
     Returns dict of {symbol: {last, open, close, high, low, change, source}}"""
     if not symbols:
         return {}
 
-    results = {}
     valid_symbols = [s for s in symbols if not is_cusip(s)]
-    for symbol in valid_symbols:
-        try:
-            # Request the symbol as-is: stripping suffixes like .TEN would
-            # silently return the price of a different security.
-            cboe_symbol = symbol.upper()
-            url = f'https://cdn.cboe.com/api/global/delayed_quotes/quotes/{cboe_symbol}.json'
-            req = urllib.request.Request(url, headers={
-                'User-Agent': user_agent,
-                'Accept': 'application/json',
-            })
-            with _urlopen(req, timeout=5) as response:
-                payload = json.loads(response.read().decode('utf-8'))
-            parsed = parse_cboe_quote(payload)
-            if parsed:
-                results[symbol] = parsed
-        except urllib.error.HTTPError as e:
-            logger.debug(f'Cboe HTTP error for {symbol}: {e.code}')
-        except Exception as e:
-            logger.debug(f'Cboe error for {symbol}: {e}')
+    results, to_fetch = _cached_quotes('cboe', valid_symbols, max_age)
+    fetched = _fetch_concurrently(lambda s: _fetch_cboe_quote(s, user_agent), to_fetch)
+    _store_quotes('cboe', fetched)
+    results.update(fetched)
 
     if results:
         logger.info(f'Cboe fallback: got prices for {len(results)}/{len(valid_symbols)} symbols')
@@ -4,19 +4,21 @@
 # runtime objects (database, IBKR manager, webview window) live on `state`,
 # set up by main.py before the server starts.
 
+import hashlib
 import json
 import logging
 import math
 import os
 import platform
+import re
 import secrets
 import threading
 import time
 
-from datetime import datetime
+from datetime import datetime, time as dt_time
 from types import SimpleNamespace
+from zoneinfo import ZoneInfo
 
-import pytz
 from flask import Flask, jsonify, render_template, request
 
 from ttc_app import app_update, flex_client
@@ -24,7 +26,10 @@ from ttc_app.config import (
     APP_DIR, APP_NAME, APP_VERSION, STATIC_DIR, TEMPLATE_DIR, USER_AGENT,
 )
 from ttc_app.ibkr_manager import IBKRUnavailableError, probe_ib_ports
-from ttc_app.price_sources import fetch_cboe_prices, fetch_yahoo_prices, is_cusip
+from ttc_app.price_sources import (
+    CLOSED_MARKET_QUOTE_CACHE_SECONDS, QUOTE_CACHE_SECONDS,
+    fetch_cboe_prices, fetch_yahoo_prices, is_cusip,
+)
 from ttc_app.tranches import income_summary, rebuild_tranches
 
 logger = logging.getLogger(__name__)
@@ -44,6 +49,9 @@ state = SimpleNamespace(
 
 app = Flask(__name__, template_folder=TEMPLATE_DIR, static_folder=STATIC_DIR)
 app.config['SECRET_KEY'] = secrets.token_hex(32)
+# Responses are read by our own JS, never diffed by humans: skip the
+# per-response key sort Flask's JSON provider does by default.
+app.json.sort_keys = False
 
 
 # ============================================
@@ -88,12 +96,17 @@ DIAGNOSTIC_MESSAGES = {
 }
 
 
+_FRIENDLY_ERRORS_RE = re.compile(
+    '|'.join(re.escape(key) for key in FRIENDLY_ERRORS), re.IGNORECASE)
+_IBKR_MENTION_RE = re.compile(r'ibkr|ib |tws', re.IGNORECASE)
+
+
 def get_friendly_error(error_message):
-    error_lower = str(error_message).lower()
-    for key, friendly in FRIENDLY_ERRORS.items():
-        if key in error_lower:
-            return friendly
-    if 'ibkr' in error_lower or 'ib ' in error_lower or 'tws' in error_lower:
+    error_message = str(error_message)
+    match = _FRIENDLY_ERRORS_RE.search(error_message)
+    if match:
+        return FRIENDLY_ERRORS[match.group(0).lower()]
+    if _IBKR_MENTION_RE.search(error_message):
         return "There was a problem connecting to IBKR. Please make sure Trader Workstation is running."
     return f"Something went wrong: {error_message}"
 
@@ -101,14 +114,14 @@ def get_friendly_error(error_message):
 # ============================================
 # Utilities
 # ============================================
+EASTERN = ZoneInfo('America/New_York')
+MARKET_OPEN = dt_time(9, 30)
+MARKET_CLOSE = dt_time(16, 0)
+
+
 def is_market_open():
-    eastern = pytz.timezone('US/Eastern')
-    now = datetime.now(eastern)
-    if now.weekday() >= 5:
-        return False
-    market_open = now.replace(hour=9, minute=30, second=0).time()
-    market_close = now.replace(hour=16, minute=0, second=0).time()
-    return market_open <= now.time() <= market_close
+    now = datetime.now(EASTERN)
+    return now.weekday() < 5 and MARKET_OPEN <= now.time() <= MARKET_CLOSE
 
 
 def calculate_shares_available(shares, np, cc, uc):
@@ -117,12 +130,13 @@ def calculate_shares_available(shares, np, cc, uc):
     return shares - cc_shares - uc_shares
 
 
-def format_data_age(timestamp_str):
+def format_data_age(timestamp_str, now=None):
+    """Human age of an ISO timestamp; pass `now` when formatting many at once."""
     if not timestamp_str:
         return 'Unknown'
     try:
         ts = datetime.fromisoformat(timestamp_str)
-        delta = datetime.now() - ts
+        delta = (now or datetime.now()) - ts
         total_seconds = int(delta.total_seconds())
         if total_seconds < 60:
             return 'Just now'
@@ -156,9 +170,11 @@ def buyback_threshold_pct():
 # ============================================
 # Price fallbacks (Yahoo -> Cboe -> DB history)
 # ============================================
-def apply_price_fallbacks(market_data, wanted_symbols, missing_symbols):
+def apply_price_fallbacks(market_data, wanted_symbols, missing_symbols, stored=None):
     """Fill missing prices: Yahoo -> Cboe -> latest DB price. Mutates
-    market_data, returns data_sources for symbols served by a fallback."""
+    market_data, returns data_sources for symbols served by a fallback.
+    `stored` is latest_prices() if the caller already has it; otherwise
+    it's queried only when some symbol actually needs the DB price."""
     data_sources = {}
 
     missing = sorted(set(missing_symbols))
@@ -167,19 +183,19 @@ def apply_price_fallbacks(market_data, wanted_symbols, missing_symbols):
             f'Attempting Yahoo Finance fallback for {len(missing)} symbols: '
             f'{", ".join(missing[:10])}{"..." if len(missing) > 10 else ""}'
         )
-        yahoo_data = fetch_yahoo_prices(missing, USER_AGENT)
+        max_age = QUOTE_CACHE_SECONDS if is_market_open() else CLOSED_MARKET_QUOTE_CACHE_SECONDS
+        yahoo_data = fetch_yahoo_prices(missing, max_age=max_age)
         for symbol, ydata in yahoo_data.items():
             market_data[symbol] = ydata
             data_sources[symbol] = 'yahoo'
 
         still_missing = [s for s in missing if s not in yahoo_data]
         if still_missing:
-            cboe_data = fetch_cboe_prices(still_missing, USER_AGENT)
+            cboe_data = fetch_cboe_prices(still_missing, USER_AGENT, max_age=max_age)
             for symbol, cdata in cboe_data.items():
                 market_data[symbol] = cdata
                 data_sources[symbol] = 'cboe'
 
-    stored = None
     for symbol in wanted_symbols:
         if symbol not in market_data or market_data[symbol].get('last', 0) == 0:
             if stored is None:
@@ -202,14 +218,16 @@ def get_ibkr_data():
         raise IBKRUnavailableError('IBKR connection manager is not running.')
 
     watchlist = state.db.get_watchlist()
-    snapshot = state.ibkr.get_snapshot([s for s in watchlist if not is_cusip(s)])
+    watchlist_stocks = [s for s in watchlist if not is_cusip(s)]
+    snapshot = state.ibkr.get_snapshot(watchlist_stocks)
     positions = snapshot['positions_raw']
     market_data = dict(snapshot['market_data'])
     options = snapshot.get('options', [])
 
-    stock_symbols = {p['symbol'] for p in positions if p['secType'] in ('STK', 'OPT')}
-    stock_symbols.update(s for s in watchlist if not is_cusip(s))
-    stock_symbols = {s for s in stock_symbols if not is_cusip(s)}
+    # CUSIP-filtered once: the watchlist half was already filtered above.
+    stock_symbols = {p['symbol'] for p in positions
+                     if p['secType'] in ('STK', 'OPT') and not is_cusip(p['symbol'])}
+    stock_symbols.update(watchlist_stocks)
 
     symbols_needing_fallback = list(snapshot['failed_symbols'])
     data_sources = {}
@@ -234,72 +252,66 @@ def get_ibkr_data():
         if 'timestamp' not in market_data[symbol]:
             market_data[symbol]['timestamp'] = now_str
 
-    stock_positions = {}
-    option_positions = {}
-    watchlist_updated = False
+    # One pass: stock fields and signed call/put contract totals per symbol
+    holdings = {}
+    watchlist_set = set(watchlist)
 
     for position in positions:
         symbol = position['symbol']
         sec_type = position['secType']
-
-        if sec_type in ('STK', 'OPT') and not is_cusip(symbol):
-            if symbol not in watchlist:
-                watchlist.append(symbol)
-                watchlist_updated = True
-
+        if sec_type not in ('STK', 'OPT'):
+            continue
+        if not is_cusip(symbol):
+            watchlist_set.add(symbol)
+
+        entry = holdings.get(symbol)
+        if entry is None:
+            entry = holdings[symbol] = {'stock': False, 'shares': 0, 'avgCost': 0,
+                                        'calls': 0, 'puts': 0}
         if sec_type == 'STK':
-            stock_positions[symbol] = {
-                'symbol': symbol,
-                'shares': position['position'],
-                'avgCost': position['avgCost'],
-                'marketPrice': market_data.get(symbol, {}).get('last', 0),
-            }
-        elif sec_type == 'OPT':
-            option_positions.setdefault(symbol, []).append({
-                'symbol': symbol,
-                'right': position['right'],
-                'position': position['position'],
-            })
-
-    if watchlist_updated:
-        state.db.set_watchlist(watchlist)
-
+            entry['stock'] = True
+            entry['shares'] = position['position']
+            entry['avgCost'] = position['avgCost']
+        elif position['right'] == 'C':
+            entry['calls'] += position['position']
+        elif position['right'] == 'P':
+            entry['puts'] += position['position']
+
+    if len(watchlist_set) != len(watchlist):
+        state.db.set_watchlist(watchlist_set)
+
+    stock_symbols_held = {s for s, entry in holdings.items() if entry['stock']}
     basic_data = {
         'positions': [],
         'incomplete_lots': [],
-        'watchlist': [s for s in watchlist if s not in stock_positions and not is_cusip(s)],
+        'watchlist': sorted(s for s in watchlist_set - stock_symbols_held if not is_cusip(s)),
         'market_data': market_data,
         'data_sources': data_sources,
         'connection_source': 'ibkr',
         'options': options,
     }
 
-    for symbol, stock_data in stock_positions.items():
-        stock_quantity = stock_data['shares']
-        complete_lots = (abs(stock_quantity) // 100) * 100
-        incomplete_lot = abs(stock_quantity) % 100
-
-        calls = [opt for opt in option_positions.get(symbol, []) if opt['right'] == 'C']
-        puts = [opt for opt in option_positions.get(symbol, []) if opt['right'] == 'P']
-
-        call_quantity = sum(opt['position'] for opt in calls)
-        put_quantity = sum(opt['position'] for opt in puts)
+    for symbol, entry in holdings.items():
+        if not entry['stock']:
+            continue
+        stock_quantity = entry['shares']
+        market_price = market_data.get(symbol, {}).get('last', 0)
+        lot_count, incomplete_lot = divmod(abs(stock_quantity), 100)
+        call_contracts = abs(entry['calls'])
 
         if stock_quantity > 0:
-            covered_calls = min((complete_lots // 100), abs(call_quantity))
-            uncovered_calls = max(0, abs(call_quantity) - (complete_lots // 100))
+            covered_calls = min(lot_count, call_contracts)
+            uncovered_calls = max(0, call_contracts - lot_count)
         else:
             covered_calls = 0
-            uncovered_calls = abs(call_quantity)
-
-        naked_puts = abs(put_quantity)
+            uncovered_calls = call_contracts
 
         basic_data['positions'].append({
             'symbol': symbol,
             'shares': stock_quantity,
-            'avgCost': stock_data['avgCost'],
-            'marketPrice': stock_data['marketPrice'],
-            'naked_puts': naked_puts,
+            'avgCost': entry['avgCost'],
+            'marketPrice': market_price,
+            'naked_puts': abs(entry['puts']),
             'covered_calls': covered_calls,
             'uncovered_calls': uncovered_calls
         })
@@ -308,13 +320,44 @@ def get_ibkr_data():
             basic_data['incomplete_lots'].append({
                 'symbol': symbol,
                 'shares': incomplete_lot,
-                'avgCost': stock_data['avgCost'],
-                'marketPrice': stock_data['marketPrice'],
+                'avgCost': entry['avgCost'],
+                'marketPrice': market_price,
             })
 
     return basic_data
 
 
+def safe_divide(a, b):
+    if b == 0 or a == 0:
+        return 0
+    result = a / b
+    return 0 if math.isnan(result) or math.isinf(result) else result
+
+
+def market_fields(symbol, mkt_data, data_sources, now=None):
+    """Derived quote fields shared by the positions, incomplete-lot and
+    watchlist rows."""
+    current_price = safe_number(mkt_data.get('last', 0))
+    daily_change = safe_number(mkt_data.get('change', 0))
+    close_price = safe_number(mkt_data.get('close', current_price))
+    open_price = safe_number(mkt_data.get('open', current_price))
+
+    base_price = current_price - daily_change if current_price != daily_change else current_price
+    source = mkt_data.get('source', data_sources.get(symbol, 'ibkr'))
+
+    return {
+        'current_price': current_price,
+        'daily_change': daily_change,
+        'daily_change_pct': safe_divide(daily_change, base_price),
+        'close_price': close_price,
+        'open_price': open_price,
+        'opening_gap': open_price - close_price if close_price else 0,
+        'source': source,
+        'data_age': (format_data_age(mkt_data.get('timestamp', ''), now)
+                     if source == 'cached' else ''),
+    }
+
+
 def enhance_with_market_data(basic_data):
     """Process market data into the legacy positional-array format the
     Positions tab renders, plus the new object-keyed options payload."""
@@ -322,47 +365,37 @@ def enhance_with_market_data(basic_data):
     data_sources = basic_data.get('data_sources', {})
     connection_source = basic_data.get('connection_source', 'ibkr')
 
-    def safe_divide(a, b):
-        try:
-            if b == 0 or a == 0:
-                return 0
-            result = a / b
-            return 0 if math.isnan(result) or math.isinf(result) else result
-        except Exception:
-            return 0
-
-    def process_market_data(symbol, mkt_data):
-        current_price = safe_number(mkt_data.get('last', 0))
-        daily_change = safe_number(mkt_data.get('change', 0))
-        close_price = safe_number(mkt_data.get('close', current_price))
-        open_price = safe_number(mkt_data.get('open', current_price))
-
-        base_price = current_price - daily_change if current_price != daily_change else current_price
-        daily_change_pct = safe_divide(daily_change, base_price)
-        opening_gap = safe_number(open_price - close_price if close_price else 0)
-
-        source = mkt_data.get('source', data_sources.get(symbol, 'ibkr'))
-        timestamp = mkt_data.get('timestamp', '')
-        data_age = format_data_age(timestamp) if source == 'cached' else ''
-
-        return {
-            'current_price': current_price,
-            'daily_change': daily_change,
-            'daily_change_pct': daily_change_pct,
-            'close_price': close_price,
-            'open_price': open_price,
-            'opening_gap': opening_gap,
-            'source': source,
-            'data_age': data_age
-        }
+    # A symbol held as both a full position and an incomplete lot (or also on
+    # the watchlist) needs its quote fields once, not once per section.
+    quote_fields = {}
+    # One clock read for every cached row's age, so rows stored together
+    # also agree on how old they are.
+    now = datetime.now()
+
+    def process_market_data(symbol):
+        data = quote_fields.get(symbol)
+        if data is None:
+            data = quote_fields[symbol] = market_fields(
+                symbol, market_data.get(symbol, {}), data_sources, now)
+        return data
 
     enhanced_positions = []
+    # Header stats are tallied while building the rows so the browser
+    # doesn't walk the positions a second time on every refresh.
+    gainers = losers = 0
+    daily_pl = 0.0
     for pos in basic_data['positions']:
         symbol = pos['symbol']
-        data = process_market_data(symbol, market_data.get(symbol, {}))
+        data = process_market_data(symbol)
+        shares = safe_number(pos['shares'])
+        if data['daily_change'] > 0:
+            gainers += 1
+        elif data['daily_change'] < 0:
+            losers += 1
+        daily_pl += data['daily_change'] * shares
         enhanced_positions.append([
             symbol,
-            safe_number(pos['shares']),
+            shares,
             data['current_price'],
             safe_number(pos['avgCost']),
             data['daily_change'],
@@ -383,7 +416,7 @@ def enhance_with_market_data(basic_data):
     enhanced_incomplete = []
     for lot in basic_data['incomplete_lots']:
         symbol = lot['symbol']
-        data = process_market_data(symbol, market_data.get(symbol, {}))
+        data = process_market_data(symbol)
         enhanced_incomplete.append([
             symbol, safe_number(lot['shares']), data['current_price'],
             safe_number(lot['avgCost']), data['daily_change'],
@@ -393,7 +426,7 @@ def enhance_with_market_data(basic_data):
 
     enhanced_watchlist = []
     for symbol in basic_data['watchlist']:
-        data = process_market_data(symbol, market_data.get(symbol, {}))
+        data = process_market_data(symbol)
         enhanced_watchlist.append([
             symbol, data['current_price'], data['daily_change'],
             data['daily_change_pct'], data['close_price'], data['open_price'],
@@ -431,6 +464,11 @@ def enhance_with_market_data(basic_data):
     for rows in options_by_symbol.values():
         rows.sort(key=lambda r: (r.get('expiry') or '', r.get('strike') or 0))
 
+    # Default alphabetical order is applied here once rather than re-sorted
+    # by the browser on every render.
+    for rows in (enhanced_positions, enhanced_incomplete, enhanced_watchlist):
+        rows.sort(key=lambda r: str(r[0]).lower())
+
     return {
         'positions': enhanced_positions,
         'incomplete_lots': enhanced_incomplete,
@@ -438,6 +476,8 @@ def enhance_with_market_data(basic_data):
         'connection_source': connection_source,
         'options_by_symbol': options_by_symbol,
         'buyback_threshold_pct': threshold,
+        'summary': {'gainers': gainers, 'losers': losers,
+                    'daily_pl': round(daily_pl, 2)},
     }
 
 
@@ -452,7 +492,7 @@ def _serve_external_fallback(reason):
             return None, None
 
         market_data = {}
-        data_sources = apply_price_fallbacks(market_data, all_symbols, all_symbols)
+        data_sources = apply_price_fallbacks(market_data, all_symbols, all_symbols, stored)
         live_sources = {s for s in data_sources.values() if s in ('yahoo', 'cboe')}
 
         fresh = {s: d for s, d in market_data.items() if d.get('source') != 'cached'}
@@ -497,9 +537,57 @@ def _serve_external_fallback(reason):
         return None, None
 
 
+# ============================================
+# Static asset fingerprints
+# ============================================
+_static_fingerprints = {}  # filename -> (mtime_ns, hash)
+
+
+def static_fingerprint(filename):
+    """Short content hash of a bundled static file, appended to its URL as
+    ?v=. Rehashed only when the file's mtime changes."""
+    path = os.path.join(STATIC_DIR, filename)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return APP_VERSION
+    cached = _static_fingerprints.get(filename)
+    if cached is None or cached[0] != mtime:
+        with open(path, 'rb') as f:
+            cached = (mtime, hashlib.blake2b(f.read(), digest_size=4).hexdigest())
+        _static_fingerprints[filename] = cached
+    return cached[1]
+
+
+@app.url_defaults
+def add_static_fingerprint(endpoint, values):
+    if endpoint == 'static' and 'filename' in values:
+        values.setdefault('v', static_fingerprint(values['filename']))
+
+
+@app.after_request
+def cache_fingerprinted_static(response):
+    # A ?v= URL naming the file's current hash identifies one exact
+    # version, so the webview can keep it without revalidating; a changed
+    # file gets a new URL. Without this, every launch revalidated each
+    # asset, and WebView2's persistent cache could keep serving pre-update
+    # JS after a self-update. Any other v (hand-written, or an old hash)
+    # keeps the default revalidating headers so it can't get pinned.
+    if (request.endpoint == 'static' and response.status_code == 200
+            and request.args.get('v') == static_fingerprint(request.view_args['filename'])):
+        response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
+
 # ============================================
 # Core routes
 # ============================================
+def preload_templates():
+    """Compile index.html up front so the window's first request doesn't
+    wait on Jinja parsing it; Flask keeps the compiled template cached."""
+    app.jinja_env.get_template('index.html')
+
+
 @app.route('/')
 def index():
     return render_template('index.html', version=APP_VERSION)
@@ -507,7 +595,7 @@ def index():
 
 @app.route('/api/data')
 def get_data():
-    logger.info('API /api/data called - starting data fetch')
+    logger.debug('API /api/data called - starting data fetch')
     try:
         ibkr_data = get_ibkr_data()
         enhanced_data = enhance_with_market_data(ibkr_data)
@@ -622,12 +710,22 @@ def build_diagnostics():
 # ============================================
 # Update routes
 # ============================================
-@app.route('/api/update/check')
-def api_check_updates():
-    update_info = app_update.check_for_updates(APP_VERSION, USER_AGENT)
+def check_for_updates():
+    """Run the update check with the release ETag kept across launches, so
+    an unchanged release costs a bodiless 304."""
+    cache = state.db.get_setting('update_release_cache') or {}
+    etag = cache.get('etag')
+    update_info = app_update.check_for_updates(APP_VERSION, USER_AGENT, cache=cache)
+    if cache.get('etag') != etag:
+        state.db.set_setting('update_release_cache', cache)
     if update_info.get('available'):
         state.pending_update = update_info
-    return jsonify(update_info)
+    return update_info
+
+
+@app.route('/api/update/check')
+def api_check_updates():
+    return jsonify(check_for_updates())
 
 
 @app.route('/api/update/download')
@@ -934,9 +1032,8 @@ def check_updates_background():
     time.sleep(3)
     for message, kind in state.startup_messages:
         show_startup_toast(message, kind)
-    update_info = app_update.check_for_updates(APP_VERSION, USER_AGENT)
+    update_info = check_for_updates()
     if update_info.get('available'):
-        state.pending_update = update_info
         show_update_dialog(update_info)
 
 
@@ -65,7 +65,7 @@ const COLUMN_DEFS = [
       rowIndex: { positions: 11 } },
     { key: "shares_available", label: "Shares Available",
       rowIndex: { positions: 12 } },
-    // No natural row index -- rendered from getSourceInfo() instead.
+    // No natural row index -- rendered from the SOURCE_INDEX slot instead.
     { key: "data_source", label: "Data Source", rowIndex: {} },
 ];
 const COLUMN_DEFS_BY_KEY = Object.fromEntries(COLUMN_DEFS.map(c => [c.key, c]));
@@ -76,12 +76,6 @@ function columnKeysForSection(section) {
         .map(c => c.key);
 }
 
-function rowValue(row, key, section) {
-    const def = COLUMN_DEFS_BY_KEY[key];
-    if (!def || !(section in def.rowIndex)) return undefined;
-    return row[def.rowIndex[section]];
-}
-
 const DEFAULT_COLUMN_CONFIG = {
     positions: { hidden: ["data_source"] },
     incomplete: { hidden: ["data_source"] },
@@ -117,7 +111,7 @@ function saveColumnConfig(section, partial) {
 }
 
 function resetColumnConfig(section) {
-    const allColumns = loadPreferences().columns || {};
+    const allColumns = { ...(loadPreferences().columns || {}) };
     delete allColumns[section];
     savePreferences({ columns: allColumns });
 }
@@ -134,17 +128,27 @@ function log(msg) {
     console.log("[TTC] " + msg);
 }
 
+// Parsed once and kept in memory: only this page writes PREFS_KEY, so the
+// cached copy stays authoritative and loads/saves skip the JSON.parse round
+// trip. Callers treat the returned object as read-only and change it via
+// savePreferences().
+let prefsCache = null;
+
 function loadPreferences() {
-    try {
-        return JSON.parse(localStorage.getItem(PREFS_KEY) || "{}");
-    } catch (e) {
-        return {};
+    if (prefsCache === null) {
+        try {
+            prefsCache = JSON.parse(localStorage.getItem(PREFS_KEY) || "{}");
+        } catch (e) {
+            prefsCache = {};
+        }
     }
+    return prefsCache;
 }
 
 function savePreferences(prefs) {
+    prefsCache = { ...loadPreferences(), ...prefs };
     try {
-        localStorage.setItem(PREFS_KEY, JSON.stringify({ ...loadPreferences(), ...prefs }));
+        localStorage.setItem(PREFS_KEY, JSON.stringify(prefsCache));
     } catch (e) {
         log("Failed to save preferences: " + e);
     }
@@ -215,25 +219,42 @@ function showToast(message, type = "info", duration = 3000, category = "actions"
     }, duration);
 }
 
+// Built once; formatToParts gives Eastern weekday/hour/minute directly instead
+// of formatting a locale string and parsing it back into a Date.
+// hourCycle h23 so midnight comes back as 0, not 24.
+const EASTERN_CLOCK = new Intl.DateTimeFormat("en-US", {
+    timeZone: "America/New_York", weekday: "short", hour: "numeric", minute: "numeric", hourCycle: "h23",
+});
+const WEEKDAY_INDEX = { Sun: 0, Mon: 1, Tue: 2, Wed: 3, Thu: 4, Fri: 5, Sat: 6 };
+
+function easternClock(date) {
+    const parts = {};
+    EASTERN_CLOCK.formatToParts(date).forEach(p => { parts[p.type] = p.value; });
+    return { day: WEEKDAY_INDEX[parts.weekday], totalMinutes: parseInt(parts.hour) * 60 + parseInt(parts.minute) };
+}
+
+// Header elements never get replaced, so look them up on the first tick only.
+let marketStatusEls = null;
+
 function updateMarketStatus() {
-    const now = new Date();
-    const eastern = new Date(now.toLocaleString("en-US", { timeZone: "America/New_York" }));
-    const day = eastern.getDay();
-    const hours = eastern.getHours();
-    const minutes = eastern.getMinutes();
-    const totalMinutes = hours * 60 + minutes;
+    const { day, totalMinutes } = easternClock(new Date());
     const marketOpen = 570; // 9:30 AM
     const marketClose = 960; // 4:00 PM
     
-    const statusEl = document.getElementById("marketStatus");
-    const countdownEl = document.getElementById("marketCountdown");
-    const textEl = statusEl.querySelector(".status-text");
+    if (!marketStatusEls) {
+        const root = document.getElementById("marketStatus");
+        marketStatusEls = {
+            status: root,
+            countdown: document.getElementById("marketCountdown"),
+            text: root.querySelector(".status-text"),
+        };
+    }
+    const { status: statusEl, countdown: countdownEl, text: textEl } = marketStatusEls;
     
     const isWeekend = day === 0 || day === 6;
     const isOpen = !isWeekend && totalMinutes >= marketOpen && totalMinutes < marketClose;
     
-    statusEl.classList.remove("open", "closed");
-    statusEl.classList.add(isOpen ? "open" : "closed");
+    statusEl.className = "market-status " + (isOpen ? "open" : "closed");
     
     if (isOpen) {
         textEl.textContent = "Market Open";
@@ -274,13 +295,18 @@ function toggleCompactView() {
 function toggleSection(section) {
     const el = document.getElementById(section + "-section");
     el.classList.toggle("collapsed");
-    const prefs = loadPreferences();
-    const collapsed = prefs.collapsedSections || [];
+    const collapsed = (loadPreferences().collapsedSections || []).slice();
     if (el.classList.contains("collapsed")) {
         if (!collapsed.includes(section)) collapsed.push(section);
     } else {
         const idx = collapsed.indexOf(section);
         if (idx > -1) collapsed.splice(idx, 1);
+        const deferred = deferredSections[section];
+        if (deferred) {
+            renderSection(deferred.container, deferred.rows, section, deferred.emptyMessage);
+            const searchVal = document.getElementById("searchInput").value;
+            if (searchVal) filterTables(searchVal);
+        }
     }
     savePreferences({ collapsedSections: collapsed });
 }
@@ -482,17 +508,17 @@ function exportToCSV() {
     // Exports whatever columns are currently visible/ordered on the
     // Positions table, so hiding/reordering columns there also reshapes CSVs.
     const cols = visibleColumnsForSection("positions");
-    let csv = cols.map(c => c.label).join(",") + "\n";
+    const lines = [cols.map(c => c.label).join(",")];
     cachedData.positions.forEach(row => {
-        const { source } = getSourceInfo(row, "positions");
-        csv += cols.map(c => {
+        const source = row[SOURCE_INDEX.positions] || "ibkr";
+        lines.push(cols.map(c => {
             if (c.key === "data_source") return SOURCE_LABELS[source] || source;
             const val = row[c.rowIndex.positions];
             if (c.key === "daily_change_pct" && typeof val === "number") return (val * 100).toFixed(2) + "%";
             return typeof val === "number" ? val.toFixed(2) : val;
-        }).join(",") + "\n";
+        }).join(","));
     });
-    const blob = new Blob([csv], { type: "text/csv" });
+    const blob = new Blob([lines.join("\n") + "\n"], { type: "text/csv" });
     const a = document.createElement("a");
     a.href = URL.createObjectURL(blob);
     a.download = "ttc_positions_" + new Date().toISOString().split("T")[0] + ".csv";
@@ -500,76 +526,181 @@ function exportToCSV() {
     showToast("Exported to CSV", "success");
 }
 
-function formatNumber(value, column) {
-    if (value === "" || value === null || value === undefined) return "";
-    const num = parseFloat(value);
-    if (isNaN(num)) return value;
-    switch (column) {
-        case "Current Price":
-        case "Last Price":
-        case "Open":
-        case "Avg Price":
-            return "$" + num.toFixed(2);
-        case "Daily Change $":
-        case "OGap":
-            return (num >= 0 ? "+" : "") + "$" + num.toFixed(2);
-        case "Daily Change %":
-            return (num >= 0 ? "+" : "") + (num * 100).toFixed(2) + "%";
-        default:
-            return num.toLocaleString();
+const formatPrice = num => "$" + num.toFixed(2);
+const formatSignedDollar = num => (num >= 0 ? "+" : "") + "$" + num.toFixed(2);
+const NUMBER_FORMATTERS = {
+    "Current Price": formatPrice,
+    "Last Price": formatPrice,
+    "Open": formatPrice,
+    "Avg Price": formatPrice,
+    "Daily Change $": formatSignedDollar,
+    "OGap": formatSignedDollar,
+    "Daily Change %": num => (num >= 0 ? "+" : "") + (num * 100).toFixed(2) + "%",
+};
+
+// Same output as num.toLocaleString(), but from one formatter built up front
+// instead of resolving the locale's number format again for every cell.
+const DEFAULT_NUMBER_FORMAT = new Intl.NumberFormat();
+
+function numberFormatterFor(column) {
+    return NUMBER_FORMATTERS[column] || DEFAULT_NUMBER_FORMAT.format;
+}
+
+function symbolLinkHtml(symbol) {
+    const safe = escapeHtml(symbol);
+    return '<a href="https://www.tradingview.com/symbols/' + safe + '/" target="_blank" class="symbol-link">' +
+        safe + ' <i class="fas fa-external-link-alt external-icon"></i></a>';
+}
+
+// Where each section's row carries its price source; the data age string
+// always sits in the slot right after it.
+const SOURCE_INDEX = { positions: 13, incomplete: 9, watchlist: 7 };
+
+const SOURCE_TOOLTIP_LABELS = {
+    ibkr: "IBKR Live",
+    yahoo: "Yahoo Finance",
+    cboe: "Cboe (delayed)",
+    cached: "Cached Data",
+    unavailable: "Unavailable"
+};
+
+function sourceDotHtml(source, dataAge) {
+    let html = '<span class="source-dot ' + escapeHtml(source) + '"><span class="price-tooltip">' +
+        '<div class="tooltip-source">' + escapeHtml(SOURCE_TOOLTIP_LABELS[source] || source) + '</div>';
+    if (dataAge) {
+        html += '<div class="tooltip-age">' + escapeHtml(dataAge) + '</div>';
     }
+    return html + '</span></span>';
 }
 
-function createSymbolLink(symbol) {
-    const a = document.createElement("a");
-    a.href = "https://www.tradingview.com/symbols/" + symbol + "/";
-    a.target = "_blank";
-    a.className = "symbol-link";
-    a.innerHTML = symbol + ' <i class="fas fa-external-link-alt external-icon"></i>';
-    return a;
-}
-
-function getSourceInfo(row, section) {
-    // Extract source and data_age from the row based on section type
-    // positions: source at [13], data_age at [14]
-    // incomplete: source at [9], data_age at [10]
-    // watchlist: source at [7], data_age at [8]
-    let source = "ibkr", dataAge = "";
-    if (section === "positions") {
-        source = row[13] || "ibkr";
-        dataAge = row[14] || "";
-    } else if (section === "incomplete") {
-        source = row[9] || "ibkr";
-        dataAge = row[10] || "";
-    } else if (section === "watchlist") {
-        source = row[7] || "ibkr";
-        dataAge = row[8] || "";
+// Sign-coloured columns vs. columns that only light up past a threshold;
+// looked up per cell instead of re-testing every key in an if/else chain.
+const SIGNED_COLUMNS = new Set(["daily_change_dollar", "daily_change_pct", "ogap"]);
+const CELL_CLASS_FOR = {
+    shares: v => v === 0 ? "zero-shares" : "",
+    np: v => v > 0 ? "naked-puts" : "",
+    cc: v => v > 0 ? "covered-calls" : "",
+    uc: v => v > 0 ? "uncovered-calls" : "",
+    shares_available: v => v > 0 ? "shares-available" : v < 0 ? "shares-negative" : "",
+};
+
+function signClass(v) {
+    return v > 0 ? "positive" : v < 0 ? "negative" : "";
+}
+
+// Resolves everything that depends only on the column (formatter, class
+// rule, row index) once per createTable, returning a per-row cell renderer.
+function cellRenderer(colDef, section) {
+    if (colDef.key === "data_source") {
+        return (row, source) => '<td>' + escapeHtml(SOURCE_LABELS[source] || source) + '</td>';
     }
-    return { source, dataAge };
+    const index = colDef.rowIndex[section];
+    if (colDef.key === "underlying") {
+        return row => '<td data-v="' + escapeHtml(row[index]) + '">' + symbolLinkHtml(row[index]) + '</td>';
+    }
+    const format = numberFormatterFor(colDef.label);
+    const text = cell => typeof cell === "number" ? escapeHtml(format(cell)) : escapeHtml(cell);
+
+    if (colDef.key === "current_price") {
+        const changeIndex = COLUMN_DEFS_BY_KEY.daily_change_dollar.rowIndex[section];
+        return (row, source, dataAge) => {
+            const cell = row[index];
+            if (typeof cell !== "number") return '<td>' + text(cell) + '</td>';
+            // Source indicator dot only when the price isn't live IBKR data
+            return '<td class="' + signClass(row[changeIndex]) + '" data-v="' + cell + '"><span class="price-cell' +
+                (source === "cached" ? " price-stale" : "") + '"><span>' + text(cell) + '</span>' +
+                (source !== "ibkr" ? sourceDotHtml(source, dataAge) : "") + '</span></td>';
+        };
+    }
+    const classFor = SIGNED_COLUMNS.has(colDef.key) ? signClass : (CELL_CLASS_FOR[colDef.key] || (() => ""));
+    return row => {
+        const cell = row[index];
+        if (typeof cell !== "number") return '<td>' + text(cell) + '</td>';
+        return '<td class="' + classFor(cell) + '" data-v="' + cell + '">' + text(cell) + '</td>';
+    };
 }
 
-function createSourceDot(source, dataAge) {
-    const dot = document.createElement("span");
-    dot.className = "source-dot " + source;
-    
-    const sourceLabels = {
-        ibkr: "IBKR Live",
-        yahoo: "Yahoo Finance",
-        cboe: "Cboe (delayed)",
-        cached: "Cached Data",
-        unavailable: "Unavailable"
+// Returns a function that renders one data row to its <td> strings (and the
+// option detail row, if any), with the per-column work resolved up front.
+function rowBuilder(section, visibleCols) {
+    const renderers = visibleCols.map(colDef => cellRenderer(colDef, section));
+    const sourceIndex = SOURCE_INDEX[section];
+    return row => {
+        const symbol = row[0];
+        const source = row[sourceIndex] || "ibkr";
+        const dataAge = row[sourceIndex + 1] || "";
+        // Expandable option rows under positions that have option contracts
+        const opts = section === "positions" ? optionsBySymbol[symbol] : null;
+        const hasOptions = opts && opts.length > 0;
+
+        const cells = visibleCols.map((colDef, i) => {
+            if (!(colDef.key === "underlying" && hasOptions)) return renderers[i](row, source, dataAge);
+            let html = '<td style="cursor:pointer" data-v="' + escapeHtml(symbol) + '">' + symbolLinkHtml(symbol) +
+                '<span class="opt-count-badge" title="' + opts.length + ' option contract(s) — click to expand">' +
+                opts.length + '</span>';
+            // Surface a buyback opportunity without needing to expand the
+            // row first -- previously only visible inside the option
+            // sub-table.
+            if (opts.some(o => o.buyback_target_hit)) {
+                html += '<span class="buyback-badge collapsed-hint" title="At least one option here has hit its buyback threshold">BUYBACK</span>';
+            }
+            return html + '<i class="fas fa-chevron-right opt-expander"></i></td>';
+        });
+        const detail = hasOptions ? optionDetailRowHtml(symbol, opts, visibleCols.length) : "";
+        return { symbol, cells, detail };
     };
-    
-    const tooltip = document.createElement("span");
-    tooltip.className = "price-tooltip";
-    let tooltipHtml = '<div class="tooltip-source">' + (sourceLabels[source] || source) + '</div>';
-    if (dataAge) {
-        tooltipHtml += '<div class="tooltip-age">' + dataAge + '</div>';
+}
+
+// What each section's current table was built from: the column config and,
+// per symbol, the cell markup last written.
+const renderedRows = { positions: null, incomplete: null, watchlist: null };
+
+// Updates the existing table in place when only values changed -- same
+// columns, same symbols, same rows with options. Only cells whose markup
+// differs are replaced, so during market hours a refresh touches the few
+// prices that moved rather than rebuilding every row. Returns false when a
+// full rebuild is needed instead.
+function patchTable(container, data, section) {
+    const previous = renderedRows[section];
+    const table = container.firstElementChild;
+    const config = getColumnConfig(section);
+    const layout = JSON.stringify(config);
+    if (!previous || !table || !table.classList.contains("data-table") ||
+        previous.layout !== layout || previous.rows.size !== data.length) return false;
+
+    const buildRow = rowBuilder(section, visibleColumnsForSection(section, config));
+    const built = new Map();
+    for (const row of data) {
+        const parts = buildRow(row);
+        const prev = previous.rows.get(parts.symbol);
+        if (!prev || built.has(parts.symbol) || !prev.detail !== !parts.detail) return false;
+        built.set(parts.symbol, parts);
     }
-    tooltip.innerHTML = tooltipHtml;
-    dot.appendChild(tooltip);
-    
-    return dot;
+
+    const trs = new Map();
+    Array.from(table.tBodies[0].children).forEach(tr => {
+        if (!tr.classList.contains("option-detail")) trs.set(tr.dataset.symbol, tr);
+    });
+    built.forEach((parts, symbol) => {
+        const prev = previous.rows.get(symbol);
+        const tr = trs.get(symbol);
+        parts.cells.forEach((cellHtml, i) => {
+            if (cellHtml !== prev.cells[i]) tr.cells[i].outerHTML = cellHtml;
+        });
+        if (parts.detail !== prev.detail) {
+            // Keep the row expanded/filtered the way the user left it.
+            const old = tr.nextElementSibling;
+            const display = old.style.display;
+            const hidden = old.classList.contains("hidden");
+            old.outerHTML = parts.detail;
+            const detail = tr.nextElementSibling;
+            detail.style.display = display;
+            detail.classList.toggle("hidden", hidden);
+        }
+    });
+    renderedRows[section] = { layout, rows: built };
+    applySort(table, section);
+    return true;
 }
 
 function createTable(data, section) {
@@ -589,147 +720,63 @@ function createTable(data, section) {
     });
     table.appendChild(colgroup);
 
+    // Header cells are markup only; one click and one mousedown listener on
+    // the thead cover sorting and resizing for every column.
     const thead = document.createElement("thead");
-    const headerRow = document.createElement("tr");
-    visibleCols.forEach(colDef => {
-        const th = document.createElement("th");
-        th.appendChild(document.createTextNode(colDef.label));
-        th.dataset.colKey = colDef.key;
-        th.classList.add("sortable");
-        th.addEventListener("click", (e) => {
-            if (e.target.closest(".th-resize-handle")) return;
-            sortTable(table, section, th.cellIndex, colDef.key);
-        });
-        const handle = document.createElement("span");
-        handle.className = "th-resize-handle";
-        handle.title = "Drag to resize";
-        handle.addEventListener("mousedown", (e) => startColumnResize(e, section, colDef.key, table));
-        handle.addEventListener("click", (e) => e.stopPropagation());
-        th.appendChild(handle);
-        headerRow.appendChild(th);
+    thead.innerHTML = '<tr>' + visibleCols.map(colDef =>
+        '<th class="sortable" data-col-key="' + escapeHtml(colDef.key) + '">' + escapeHtml(colDef.label) +
+        '<span class="th-resize-handle" title="Drag to resize"></span></th>').join("") + '</tr>';
+    thead.addEventListener("click", (e) => {
+        if (e.target.closest(".th-resize-handle")) return;
+        const th = e.target.closest("th");
+        if (th) sortTable(table, section, th.cellIndex, th.dataset.colKey);
+    });
+    thead.addEventListener("mousedown", (e) => {
+        const handle = e.target.closest(".th-resize-handle");
+        if (handle) startColumnResize(e, section, handle.parentElement.dataset.colKey, table, handle);
     });
-    thead.appendChild(headerRow);
     table.appendChild(thead);
 
+    // Rows arrive already sorted by symbol (see enhance_with_market_data()).
     const tbody = document.createElement("tbody");
-    data.sort((a, b) => a[0].toString().toLowerCase().localeCompare(b[0].toString().toLowerCase()));
 
+    // Rows are built as one HTML string and parsed in a single innerHTML
+    // assignment -- per-cell createElement/appendChild was the bulk of each
+    // auto-refresh.
+    const buildRow = rowBuilder(section, visibleCols);
+    const built = new Map();
+    let html = "";
     data.forEach(row => {
-        const tr = document.createElement("tr");
-        const { source, dataAge } = getSourceInfo(row, section);
-
-        visibleCols.forEach(colDef => {
-            const td = document.createElement("td");
-            const header = colDef.label;
-
-            if (colDef.key === "data_source") {
-                td.textContent = SOURCE_LABELS[source] || source;
-                tr.appendChild(td);
-                return;
-            }
+        const parts = buildRow(row);
+        built.set(parts.symbol, parts);
+        html += '<tr data-symbol="' + escapeHtml(parts.symbol) + '"' +
+            (parts.detail ? ' class="has-options"' : '') + '>' + parts.cells.join("") + '</tr>' + parts.detail;
+    });
+    tbody.innerHTML = html;
+    renderedRows[section] = { layout: JSON.stringify(config), rows: built };
 
-            const cell = row[colDef.rowIndex[section]];
-
-            if (colDef.key === "underlying") {
-                td.appendChild(createSymbolLink(cell));
-            } else if (typeof cell === "number") {
-                if (colDef.key === "current_price") {
-                    // Add source indicator dot for Current Price column
-                    const wrapper = document.createElement("span");
-                    wrapper.className = "price-cell";
-                    if (source === "cached") wrapper.classList.add("price-stale");
-
-                    const priceText = document.createElement("span");
-                    priceText.textContent = formatNumber(cell, header);
-                    wrapper.appendChild(priceText);
-
-                    // Only show dot when source is not IBKR (non-live data)
-                    if (source !== "ibkr") {
-                        wrapper.appendChild(createSourceDot(source, dataAge));
-                    }
-
-                    td.appendChild(wrapper);
-
-                    const change = rowValue(row, "daily_change_dollar", section);
-                    if (change > 0) td.classList.add("positive");
-                    if (change < 0) td.classList.add("negative");
-                } else {
-                    td.textContent = formatNumber(cell, header);
-                    if (["daily_change_dollar", "daily_change_pct", "ogap"].includes(colDef.key)) {
-                        if (cell > 0) td.classList.add("positive");
-                        if (cell < 0) td.classList.add("negative");
-                    } else if (colDef.key === "shares" && cell === 0) {
-                        td.classList.add("zero-shares");
-                    } else if (colDef.key === "np" && cell > 0) {
-                        td.classList.add("naked-puts");
-                    } else if (colDef.key === "cc" && cell > 0) {
-                        td.classList.add("covered-calls");
-                    } else if (colDef.key === "uc" && cell > 0) {
-                        td.classList.add("uncovered-calls");
-                    } else if (colDef.key === "shares_available") {
-                        if (cell > 0) td.classList.add("shares-available");
-                        if (cell < 0) td.classList.add("shares-negative");
-                    }
-                }
-            } else {
-                td.textContent = cell;
-            }
-            tr.appendChild(td);
+    // One delegated listener instead of one per expandable row.
+    if (section === "positions") {
+        tbody.addEventListener("click", (e) => {
+            const td = e.target.closest("td");
+            if (!td || td.cellIndex !== 0 || e.target.closest("a")) return; // symbol link still works
+            const tr = td.parentElement;
+            if (tr.parentElement !== tbody || !tr.classList.contains("has-options")) return;
+            const detail = tr.nextElementSibling;
+            if (!detail || !detail.classList.contains("option-detail")) return;
+            const open = detail.style.display !== "none";
+            detail.style.display = open ? "none" : "";
+            tr.classList.toggle("expanded", !open);
         });
-        tbody.appendChild(tr);
-
-        // Expandable option rows under positions that have option contracts
-        if (section === "positions") {
-            const symbol = row[0];
-            const opts = optionsBySymbol[symbol];
-            if (opts && opts.length > 0) {
-                tr.classList.add("has-options");
-                tr.dataset.symbol = symbol;
-                const firstTd = tr.querySelector("td:first-child");
-                const badge = document.createElement("span");
-                badge.className = "opt-count-badge";
-                badge.textContent = opts.length;
-                badge.title = opts.length + " option contract(s) — click to expand";
-                firstTd.appendChild(badge);
-
-                // Surface a buyback opportunity without needing to expand the
-                // row first -- previously only visible inside the option
-                // sub-table.
-                if (opts.some(o => o.buyback_target_hit)) {
-                    const buybackBadge = document.createElement("span");
-                    buybackBadge.className = "buyback-badge collapsed-hint";
-                    buybackBadge.textContent = "BUYBACK";
-                    buybackBadge.title = "At least one option here has hit its buyback threshold";
-                    firstTd.appendChild(buybackBadge);
-                }
-
-                const expander = document.createElement("i");
-                expander.className = "fas fa-chevron-right opt-expander";
-                firstTd.appendChild(expander);
-
-                const detail = buildOptionDetailRow(symbol, opts, visibleCols.length);
-                detail.style.display = "none";
-                tbody.appendChild(detail);
-
-                firstTd.style.cursor = "pointer";
-                firstTd.addEventListener("click", (e) => {
-                    if (e.target.closest("a")) return; // symbol link still works
-                    const open = detail.style.display !== "none";
-                    detail.style.display = open ? "none" : "";
-                    tr.classList.toggle("expanded", !open);
-                });
-            }
-        }
-    });
+    }
     table.appendChild(tbody);
     applySort(table, section);
     return table;
 }
 
-function startColumnResize(e, section, key, table) {
+function startColumnResize(e, section, key, table, handle) {
     e.preventDefault();
     e.stopPropagation();
-    const handle = e.currentTarget;
     const th = handle.closest("th");
     const colIndex = th.cellIndex;
     const col = table.querySelector("colgroup").children[colIndex];
@@ -755,14 +802,9 @@ function startColumnResize(e, section, key, table) {
     document.addEventListener("mouseup", onUp);
 }
 
-function buildOptionDetailRow(symbol, opts, colspan) {
-    const tr = document.createElement("tr");
-    tr.className = "option-detail";
-    tr.dataset.parent = symbol;
-    const td = document.createElement("td");
-    td.colSpan = colspan;
-
-    let html = '<table class="option-subtable"><thead><tr>' +
+function optionDetailRowHtml(symbol, opts, colspan) {
+    let html = '<tr class="option-detail" data-parent="' + escapeHtml(symbol) + '" style="display:none">' +
+        '<td colspan="' + colspan + '"><table class="option-subtable"><thead><tr>' +
         '<th>Contract</th><th>Pos</th><th>Strike</th><th>Expiry</th><th>DTE</th>' +
         '<th>Delta</th><th>Theta</th><th>IV</th><th>Entry</th><th>Mark</th>' +
         '<th>Prem. Left</th><th></th></tr></thead><tbody>';
@@ -787,10 +829,7 @@ function buildOptionDetailRow(symbol, opts, colspan) {
             '<td>' + (o.buyback_target_hit ? '<span class="buyback-badge">BUYBACK TARGET</span>' : '') + '</td>' +
             '</tr>';
     });
-    html += '</tbody></table>';
-    td.innerHTML = html;
-    tr.appendChild(td);
-    return tr;
+    return html + '</tbody></table></td></tr>';
 }
 
 function sortTable(table, section, colIndex, key) {
@@ -830,28 +869,49 @@ function doSort(table, colIndex, key, dir) {
     const th = table.querySelector('th[data-col-key="' + key + '"]');
     if (th) th.classList.add(dir);
 
-    rows.sort((a, b) => {
-        const aVal = getCellValue(a, colIndex);
-        const bVal = getCellValue(b, colIndex);
-        if (isNaN(parseFloat(aVal)) || isNaN(parseFloat(bVal))) {
-            return dir === "asc" ? aVal.localeCompare(bVal) : bVal.localeCompare(aVal);
-        }
-        return dir === "asc" ? parseFloat(aVal) - parseFloat(bVal) : parseFloat(bVal) - parseFloat(aVal);
+    // Read and parse each row's cell once up front rather than inside the
+    // comparator, which runs O(n log n) times.
+    const keyed = rows.map(row => {
+        const text = getCellValue(row, colIndex);
+        return { row, text, num: parseFloat(text) };
+    });
+    const sign = dir === "asc" ? 1 : -1;
+    keyed.sort((a, b) => {
+        if (isNaN(a.num) || isNaN(b.num)) return sign * a.text.localeCompare(b.text);
+        return sign * (a.num - b.num);
     });
 
-    rows.forEach(row => {
-        tbody.appendChild(row);
+    // Reorder off-DOM and re-insert once so the table lays out a single time.
+    const frag = document.createDocumentFragment();
+    keyed.forEach(({ row }) => {
+        frag.appendChild(row);
         const detail = row.dataset.symbol && details[row.dataset.symbol];
-        if (detail) tbody.appendChild(detail);
+        if (detail) frag.appendChild(detail);
     });
+    tbody.appendChild(frag);
 }
 
+// Numeric and symbol cells carry their raw value in data-v, so sorting
+// needn't strip "$", "%" and badge text back out of the formatted display.
 function getCellValue(row, index) {
-    const cell = row.querySelector("td:nth-child(" + (index + 1) + ")");
-    return cell ? cell.textContent.trim().replace(/[$%+,]/g, "") : "";
+    const cell = row.cells[index];
+    if (!cell) return "";
+    if (cell.dataset.v !== undefined) return cell.dataset.v;
+    return cell.textContent.trim().replace(/[$%+,]/g, "");
 }
 
 function filterTables(searchText) {
+    // Compiled once per call; a half-typed pattern like "BRK(" isn't a valid
+    // regex, so fall back to a plain substring match instead of throwing.
+    let pattern = null;
+    try {
+        pattern = new RegExp(searchText, "i");
+    } catch (e) {
+        pattern = null;
+    }
+    const needle = searchText.toLowerCase();
+    const matches = symbol => pattern ? pattern.test(symbol) : symbol.toLowerCase().includes(needle);
+
     document.querySelectorAll("#tab-positions table:not(.option-subtable)").forEach(table => {
         const tbody = table.querySelector("tbody");
         if (!tbody) return;
@@ -862,17 +922,15 @@ function filterTables(searchText) {
         let hasVisible = false;
 
         rows.forEach(row => {
-            const symbol = row.querySelector("td:first-child")?.textContent || "";
-            if (symbol.match(new RegExp(searchText, "i"))) {
-                row.classList.remove("hidden");
-                hasVisible = true;
-            } else {
-                row.classList.add("hidden");
-            }
-            const detail = row.dataset.symbol
-                ? table.querySelector('tr.option-detail[data-parent="' + row.dataset.symbol + '"]')
-                : null;
-            if (detail) detail.classList.toggle("hidden", row.classList.contains("hidden"));
+            // data-symbol rather than the first cell's text, which also
+            // carries the option-count and BUYBACK badges.
+            const symbol = row.dataset.symbol || "";
+            const hidden = !matches(symbol);
+            row.classList.toggle("hidden", hidden);
+            if (!hidden) hasVisible = true;
+            // doSort/createTable always keep a row's option detail directly after it.
+            const detail = row.nextElementSibling;
+            if (detail && detail.classList.contains("option-detail")) detail.classList.toggle("hidden", hidden);
         });
         
         let noResults = table.parentElement.querySelector(".no-results");
@@ -897,43 +955,64 @@ function clearSearch() {
     input.focus();
 }
 
+// Elements every refresh writes to. None of them is ever replaced (only
+// their contents are), so they are looked up once, on first use.
+let refreshElCache = null;
+
+function refreshEls() {
+    if (!refreshElCache) {
+        const byId = id => document.getElementById(id);
+        refreshElCache = {
+            positionsTable: byId("positions-table"),
+            incompleteTable: byId("incomplete-table"),
+            watchlistTable: byId("watchlist-table"),
+            statPositions: byId("statPositions"),
+            statWatchlist: byId("statWatchlist"),
+            statGainers: byId("statGainers"),
+            statLosers: byId("statLosers"),
+            statDailyPL: byId("statDailyPL"),
+            positionsCount: byId("positions-count"),
+            incompleteCount: byId("incomplete-count"),
+            watchlistCount: byId("watchlist-count"),
+            lastUpdate: byId("lastUpdate"),
+            connectionStatus: byId("connectionStatus"),
+            fallbackBanner: byId("fallbackBanner"),
+            fallbackMessage: byId("fallbackBanner").querySelector("span"),
+            searchInput: byId("searchInput"),
+            refreshIcon: document.querySelector(".refresh-icon"),
+        };
+    }
+    return refreshElCache;
+}
+
 function updateSummaryStats(data) {
-    document.getElementById("statPositions").textContent = data.positions.length;
-    document.getElementById("statWatchlist").textContent = data.watchlist.length;
+    const els = refreshEls();
+    els.statPositions.textContent = data.positions.length;
+    els.statWatchlist.textContent = data.watchlist.length;
     
-    let gainers = 0, losers = 0, dailyPL = 0;
-    data.positions.forEach(pos => {
-        const change = pos[4];
-        if (change > 0) gainers++;
-        if (change < 0) losers++;
-        dailyPL += change * pos[1];
-    });
-    
-    document.getElementById("statGainers").textContent = gainers;
-    document.getElementById("statLosers").textContent = losers;
+    // Tallied server-side in enhance_with_market_data().
+    const { gainers, losers, daily_pl: dailyPL } = data.summary;
+
+    els.statGainers.textContent = gainers;
+    els.statLosers.textContent = losers;
     
-    const plEl = document.getElementById("statDailyPL");
-    plEl.textContent = (dailyPL >= 0 ? "+" : "") + "$" + dailyPL.toFixed(2);
-    plEl.className = "stat-value " + (dailyPL >= 0 ? "positive" : "negative");
+    els.statDailyPL.textContent = (dailyPL >= 0 ? "+" : "") + "$" + dailyPL.toFixed(2);
+    els.statDailyPL.className = "stat-value " + (dailyPL >= 0 ? "positive" : "negative");
 }
 
 function updateSectionCounts(data) {
-    document.getElementById("positions-count").textContent = data.positions.length;
-    document.getElementById("incomplete-count").textContent = data.incomplete_lots.length;
-    document.getElementById("watchlist-count").textContent = data.watchlist.length;
+    const els = refreshEls();
+    els.positionsCount.textContent = data.positions.length;
+    els.incompleteCount.textContent = data.incomplete_lots.length;
+    els.watchlistCount.textContent = data.watchlist.length;
 }
 
 function updateLastUpdateTime() {
-    document.getElementById("lastUpdate").innerHTML = '<i class="far fa-clock"></i> <span>Updated at ' + new Date().toLocaleTimeString() + '</span>';
+    refreshEls().lastUpdate.innerHTML = '<i class="far fa-clock"></i> <span>Updated at ' + new Date().toLocaleTimeString() + '</span>';
 }
 
 function setLoadingState(loading) {
-    const icon = document.querySelector(".refresh-icon");
-    if (loading) {
-        icon.classList.add("refreshing");
-    } else {
-        icon.classList.remove("refreshing");
-    }
+    refreshEls().refreshIcon.classList.toggle("refreshing", loading);
 }
 
 const SOURCE_LABELS = {
@@ -956,44 +1035,100 @@ function notifyDataSourceChange(data) {
     lastConnectionSource = source;
 }
 
+// One className assignment replaces the old remove()/add() pairs; the
+// element only ever carries a state class plus "clickable".
+function setConnectionStatus(stateClass, label) {
+    const statusEl = refreshEls().connectionStatus;
+    statusEl.className = stateClass + " clickable";
+    statusEl.innerHTML = '<i class="fas fa-plug"></i> ' + label;
+}
+
 function updateConnectionStatus(data) {
-    const statusEl = document.getElementById("connectionStatus");
     const source = data.connection_source || "ibkr";
     
-    // Remove any existing fallback banner
-    const existingBanner = document.querySelector(".fallback-banner");
-    if (existingBanner) existingBanner.remove();
-    
+    // The banner is part of the page; a refresh only updates its text and
+    // visibility rather than rebuilding it.
+    const els = refreshEls();
+    els.fallbackBanner.hidden = !data.fallback;
+
     if (data.fallback) {
-        // Show fallback banner with a "Why?" link to open diagnostics
-        const banner = document.createElement("div");
-        banner.className = "fallback-banner";
-        const msg = data.fallback_message || "Using fallback data";
-        banner.innerHTML = '<i class="fas fa-exclamation-triangle"></i> <span></span> <button type="button" class="fallback-why-link">Why?</button>';
-        banner.querySelector("span").textContent = msg;
-        banner.querySelector(".fallback-why-link").addEventListener("click", openDiagnosticsModal);
-        const header = document.querySelector(".header");
-        header.parentElement.insertBefore(banner, header.nextSibling);
-
-        statusEl.classList.remove("connected", "disconnected");
-        statusEl.classList.add("fallback", "clickable");
-        statusEl.innerHTML = '<i class="fas fa-plug"></i> ' + (source === "yahoo" ? "Yahoo Finance" : "Cached Data");
+        els.fallbackMessage.textContent = data.fallback_message || "Using fallback data";
+        setConnectionStatus("fallback", source === "yahoo" ? "Yahoo Finance" : "Cached Data");
     } else if (source === "ibkr") {
-        statusEl.classList.remove("disconnected", "fallback");
-        statusEl.classList.add("connected", "clickable");
-        statusEl.innerHTML = '<i class="fas fa-plug"></i> IBKR Connected';
+        setConnectionStatus("connected", "IBKR Connected");
     } else if (source === "yahoo") {
-        statusEl.classList.remove("connected", "disconnected");
-        statusEl.classList.add("fallback", "clickable");
-        statusEl.innerHTML = '<i class="fas fa-plug"></i> Yahoo Finance';
+        setConnectionStatus("fallback", "Yahoo Finance");
     } else if (source === "cboe") {
-        statusEl.classList.remove("connected", "disconnected");
-        statusEl.classList.add("fallback", "clickable");
-        statusEl.innerHTML = '<i class="fas fa-plug"></i> Cboe';
+        setConnectionStatus("fallback", "Cboe");
     } else if (source === "cached") {
-        statusEl.classList.remove("connected", "disconnected");
-        statusEl.classList.add("fallback", "clickable");
-        statusEl.innerHTML = '<i class="fas fa-plug"></i> Cached Data';
+        setConnectionStatus("fallback", "Cached Data");
+    }
+}
+
+// Signature of what each section last rendered from. Most auto-refresh ticks
+// outside market hours return identical rows, so an unchanged section keeps
+// its existing table (and with it the current sort, filter and expanded
+// option rows) instead of being torn down and rebuilt.
+const renderedSignatures = { positions: null, incomplete: null, watchlist: null };
+const deferredSections = {};
+
+function renderSection(container, rows, section, emptyMessage) {
+    const signature = JSON.stringify([
+        rows,
+        getColumnConfig(section),
+        section === "positions" ? optionsBySymbol : null,
+    ]);
+    if (signature === renderedSignatures[section] && container.firstElementChild) {
+        delete deferredSections[section];
+        return;
+    }
+    // A collapsed section isn't visible, so building its table now is wasted
+    // work; hold the newest rows and build them when it's next expanded.
+    if (container.closest(".collapsed")) {
+        deferredSections[section] = { container, rows, emptyMessage };
+        return;
+    }
+    delete deferredSections[section];
+    renderedSignatures[section] = signature;
+    if (rows.length > 0 && patchTable(container, rows, section)) return;
+
+    renderedRows[section] = null;
+    container.innerHTML = rows.length > 0 ? "" : '<div class="no-results">' + emptyMessage + '</div>';
+    if (rows.length > 0) container.appendChild(createTable(rows, section));
+}
+
+// All DOM writes for a refresh happen in one animation frame so the browser
+// lays out once. If another response lands before that frame runs, only the
+// newest data is rendered.
+let pendingRenderData = null;
+
+function scheduleRender(data) {
+    const alreadyScheduled = pendingRenderData !== null;
+    pendingRenderData = data;
+    if (!alreadyScheduled) requestAnimationFrame(renderPendingData);
+}
+
+function renderPendingData() {
+    const data = pendingRenderData;
+    pendingRenderData = null;
+    try {
+        optionsBySymbol = data.options_by_symbol || {};
+
+        const els = refreshEls();
+        renderSection(els.positionsTable, data.positions, "positions", "No positions found");
+        renderSection(els.incompleteTable, data.incomplete_lots, "incomplete", "No incomplete lots");
+        renderSection(els.watchlistTable, data.watchlist, "watchlist", "No watchlist items");
+
+        updateLastUpdateTime();
+        updateSummaryStats(data);
+        updateSectionCounts(data);
+        updateConnectionStatus(data);
+
+        const searchVal = els.searchInput.value;
+        if (searchVal) filterTables(searchVal);
+    } catch (error) {
+        console.error("Render error:", error);
+        showToast(error.message, "error", 3000, "errors");
     }
 }
 
@@ -1022,29 +1157,8 @@ async function updateTables() {
         
         log("Data received: " + data.positions.length + " positions, " + data.watchlist.length + " watchlist");
         cachedData = data;
+        scheduleRender(data);
 
-        const positionsTable = document.getElementById("positions-table");
-        const incompleteTable = document.getElementById("incomplete-table");
-        const watchlistTable = document.getElementById("watchlist-table");
-
-        optionsBySymbol = data.options_by_symbol || {};
-
-        positionsTable.innerHTML = data.positions.length > 0 ? "" : '<div class="no-results">No positions found</div>';
-        incompleteTable.innerHTML = data.incomplete_lots.length > 0 ? "" : '<div class="no-results">No incomplete lots</div>';
-        watchlistTable.innerHTML = data.watchlist.length > 0 ? "" : '<div class="no-results">No watchlist items</div>';
-
-        if (data.positions.length > 0) positionsTable.appendChild(createTable(data.positions, "positions"));
-        if (data.incomplete_lots.length > 0) incompleteTable.appendChild(createTable(data.incomplete_lots, "incomplete"));
-        if (data.watchlist.length > 0) watchlistTable.appendChild(createTable(data.watchlist, "watchlist"));
-        
-        updateLastUpdateTime();
-        updateSummaryStats(data);
-        updateSectionCounts(data);
-        updateConnectionStatus(data);
-        
-        const searchVal = document.getElementById("searchInput").value;
-        if (searchVal) filterTables(searchVal);
-        
         notifyDataSourceChange(data);
         if (!data.fallback) {
             showToast("Data refreshed", "success", 1500, "refresh");
@@ -1054,10 +1168,7 @@ async function updateTables() {
         log("Error: " + error.message);
         console.error("Fetch error:", error);
         showToast(error.message, "error", 3000, "errors");
-        const csEl = document.getElementById("connectionStatus");
-        csEl.classList.remove("connected", "fallback");
-        csEl.classList.add("disconnected", "clickable");
-        csEl.innerHTML = '<i class="fas fa-plug"></i> Connection Error';
+        setConnectionStatus("disconnected", "Connection Error");
     } finally {
         isRefreshing = false;
         setLoadingState(false);
@@ -1177,7 +1288,12 @@ document.addEventListener("DOMContentLoaded", () => {
         updateTables();
     });
     document.getElementById("refreshRate").addEventListener("change", (e) => setRefreshRate(parseInt(e.target.value)));
-    document.getElementById("searchInput").addEventListener("input", (e) => filterTables(e.target.value));
+    // Debounced so a burst of keystrokes filters once, not once per key.
+    let searchTimer;
+    document.getElementById("searchInput").addEventListener("input", (e) => {
+        clearTimeout(searchTimer);
+        searchTimer = setTimeout(() => filterTables(e.target.value), 100);
+    });
     document.getElementById("clearSearch").addEventListener("click", clearSearch);
     document.getElementById("shortcuts-modal").addEventListener("click", (e) => {
         if (e.target === document.getElementById("shortcuts-modal")) closeShortcutsModal();